@@ -28,8 +28,6 @@ a = Analysis(
         'striprtf.striprtf',
         # PDF processing
         'fpdf',  # fpdf2 is imported as fpdf
-        'pypdf',
-        'pypdf.generic',
         'fitz',  # PyMuPDF is imported as fitz
         # Image processing
         'PIL',
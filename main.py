@@ -1,6 +1,7 @@
 #!/usr/bin/env python3
 import sys
 import logging
+import multiprocessing
 import os # Import os for file operations
 from pathlib import Path
 import pandas as pd
@@ -19,7 +20,8 @@ from src.data_processing import (
     create_toc_structure,
     convert_all,
     create_automatic_sections,
-    save_mismatch_report_to_file
+    save_mismatch_report_to_file,
+    sort_by_section
 )
 # Import the PDF utility functions
 from src.pdf_utils import (
@@ -112,7 +114,8 @@ def main(config: GUIConfig = None, progress_callback=None):
     
     # --- Step 1: Extract Titles from RTF Files ---
     logging.info("1. Extracting titles from RTF files...")
-    titles_df = build_title_dataframe(input_folder)
+    titles_df = build_title_dataframe(input_folder, use_cache=config.use_title_cache,
+                                      force=config.refresh_title_cache)
     if titles_df.empty:
         logging.error("No RTF files found in input folder")
         sys.exit(1)
@@ -159,7 +162,7 @@ def main(config: GUIConfig = None, progress_callback=None):
     # Sort final_df to ensure consistent ordering throughout the process
     if 'section_number' in final_df.columns and 'filename_stem' in final_df.columns:
         logging.info("Sorting data by section_number and filename_stem...")
-        final_df = final_df.sort_values(by=['section_number', 'filename_stem'])
+        final_df = sort_by_section(final_df)
         logging.info(f"   Sorted {len(final_df)} files for consistent ordering.")
     
     logging.info(f"   Validated {len(final_df)} files for processing.")
@@ -203,7 +206,8 @@ def main(config: GUIConfig = None, progress_callback=None):
         if progress_callback:
             progress_callback(50, file_index / total_files)
     
-    ok, bad = convert_all(final_df, output_pdf_folder, progress_callback=convert_progress_callback)
+    ok, bad = convert_all(final_df, output_pdf_folder, progress_callback=convert_progress_callback,
+                          max_workers=config.conversion_workers)
     logging.info(f"   Conversion Done: {ok} succeeded, {bad} failed.")
     if ok == 0:
         logging.error("No RTF files were successfully converted; aborting PDF generation.")
@@ -255,6 +259,8 @@ def main(config: GUIConfig = None, progress_callback=None):
         progress_callback(100)
 
 if __name__ == "__main__":
+    # Needed for process pools in frozen (PyInstaller) builds
+    multiprocessing.freeze_support()
     # For command line usage, use the CLI implementation
     from src.cli import main as cli_main
     sys.exit(cli_main())
@@ -1,6 +1,7 @@
 #!/usr/bin/env python3
 import sys
 import os
+import multiprocessing
 from pathlib import Path
 
 # Add the parent directory to the Python path
@@ -10,5 +11,7 @@ sys.path.append(str(Path(__file__).parent))
 from src.gui import main
 
 if __name__ == "__main__":
+    # Needed for process pools in frozen (PyInstaller) builds
+    multiprocessing.freeze_support()
     main() 
     
\ No newline at end of file
@@ -1,6 +1,7 @@
 #!/usr/bin/env python3
 import argparse
 import logging
+import multiprocessing
 from pathlib import Path
 from src.gui_config import GUIConfig
 
@@ -68,6 +69,27 @@ def parse_args():
         help="Header font size (default: 10.0)"
     )
     
+    # Conversion options
+    parser.add_argument(
+        "--conversion-workers",
+        type=int,
+        default=1,
+        help="Number of Word instances converting RTFs in parallel (default: 1)"
+    )
+    
+    # Title cache options
+    parser.add_argument(
+        "--no-title-cache",
+        dest="use_title_cache",
+        action="store_false",
+        help="Extract every title without reading or updating the title cache"
+    )
+    parser.add_argument(
+        "--refresh-title-cache",
+        action="store_true",
+        help="Re-extract every title and refresh the title cache (e.g. after a stale title)"
+    )
+    
     # Logging options
     parser.add_argument(
         "--log-level",
@@ -100,6 +122,8 @@ def validate_args(args):
         raise ValueError("Font size must be positive")
     if args.header_font_size <= 0:
         raise ValueError("Header font size must be positive")
+    if args.conversion_workers < 1:
+        raise ValueError("Conversion workers must be at least 1")
 
 def create_config_from_args(args):
     """Create a GUIConfig object from command line arguments."""
@@ -114,6 +138,9 @@ def create_config_from_args(args):
         margin_mm=args.margin,
         font_size=args.font_size,
         header_font_size=args.header_font_size,
+        conversion_workers=args.conversion_workers,
+        use_title_cache=args.use_title_cache,
+        refresh_title_cache=args.refresh_title_cache,
         log_level=args.log_level
     )
     return config
@@ -122,6 +149,10 @@ def main():
     """Main entry point for CLI version."""
     # Parse and validate arguments
     args = parse_args()
+    logging.basicConfig(
+        level=args.log_level,
+        format="%(asctime)s - %(levelname)s - %(message)s"
+    )
     try:
         validate_args(args)
     except ValueError as e:
@@ -143,4 +174,6 @@ def main():
         return 1
 
 if __name__ == "__main__":
+    # Needed for process pools in frozen (PyInstaller) builds
+    multiprocessing.freeze_support()
     main() 
\ No newline at end of file
@@ -5,8 +5,8 @@ from typing import Tuple
 
 import pandas as pd
 
-# Import the converter function needed by convert_all
-from src.rtf_converter import convert_rtf_to_pdf
+# Import the converter needed by convert_all
+from src.rtf_converter import convert_rtf_batch
 
 # Configure logging (can be configured globally in main if preferred)
 # logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
@@ -212,7 +212,8 @@ def save_mismatch_report_to_file(report: dict, output_path: Path) -> None:
 # PROCESSING LOOP
 # —————————————————————————————————————————————————————————————————————————
 
-def convert_all(final_df: pd.DataFrame, output_pdf_folder: Path, progress_callback=None) -> tuple[int, int]:
+def convert_all(final_df: pd.DataFrame, output_pdf_folder: Path, progress_callback=None,
+                max_workers: int | None = 1) -> tuple[int, int]:
     """
     Convert all RTF files to PDFs using Word COM automation.
     
@@ -221,6 +222,8 @@ def convert_all(final_df: pd.DataFrame, output_pdf_folder: Path, progress_callba
         output_pdf_folder: Path to output folder for PDFs
         progress_callback: Optional callback function to report progress
                          Called with (file_index, total_files)
+        max_workers: Number of parallel Word instances (see convert_rtf_batch);
+                     1 (default) converts serially in this process
     
     Returns:
         Tuple of (successful_conversions, failed_conversions)
@@ -229,31 +232,20 @@ def convert_all(final_df: pd.DataFrame, output_pdf_folder: Path, progress_callba
         logging.warning("No files to convert.")
         return 0, 0
         
-    total_files = len(final_df)
     successful = 0
     failed = 0
     
-    for index, row in final_df.iterrows():
-        try:
-            file_path = row['filepath']
-            title = row['title']
-            
-            # Convert RTF to PDF
-            pdf_path = output_pdf_folder / f"{Path(file_path).stem}.pdf"
-            if convert_rtf_to_pdf(str(file_path), str(pdf_path), title):
-                successful += 1
-                logging.info(f"Successfully converted {file_path.name}")
-            else:
-                failed += 1
-                logging.error(f"Failed to convert {file_path.name}")
-                
-            # Report progress
-            if progress_callback:
-                progress_callback(index + 1, total_files)
-                
-        except Exception as e:
+    file_paths = [Path(file_path) for file_path in final_df['filepath']]
+    pairs = [(str(file_path), str(output_pdf_folder / f"{file_path.stem}.pdf")) for file_path in file_paths]
+    results = convert_rtf_batch(pairs, max_workers=max_workers, progress_callback=progress_callback)
+    
+    for file_path, converted in zip(file_paths, results):
+        if converted:
+            successful += 1
+            logging.info(f"Successfully converted {file_path.name}")
+        else:
             failed += 1
-            logging.error(f"Error converting {file_path.name}: {e}")
+            logging.error(f"Failed to convert {file_path.name}")
             
     return successful, failed
 
@@ -262,6 +254,19 @@ def convert_all(final_df: pd.DataFrame, output_pdf_folder: Path, progress_callba
 # TOC DATA STRUCTURE GENERATION
 # —————————————————————————————————————————————————————————————————————————
 
+def section_sort_key(section_number) -> tuple:
+    """Natural sort key for a section number, so '2' sorts before '10' and '14.2' before '14.10'."""
+    return tuple((0, int(part)) if part.isdigit() else (1, part) for part in str(section_number).split('.'))
+
+
+def sort_by_section(df: pd.DataFrame) -> pd.DataFrame:
+    """Sorts by section number (numerically, part by part), then filename stem within the section."""
+    return df.sort_values(
+        by=['section_number', 'filename_stem'],
+        key=lambda col: col.map(section_sort_key) if col.name == 'section_number' else col
+    )
+
+
 def create_toc_structure(final_df: pd.DataFrame) -> pd.DataFrame:
     """Sorts the merged/validated data and creates a TOC structure DataFrame.
 
@@ -280,7 +285,7 @@ def create_toc_structure(final_df: pd.DataFrame) -> pd.DataFrame:
     """
     logging.info("Sorting data and preparing TOC structure...")
     # Sort by section, then filename stem within the section
-    df_sorted = final_df.sort_values(by=['section_number', 'filename_stem'])
+    df_sorted = sort_by_section(final_df)
 
     toc_rows = []
     last_section = None
@@ -54,6 +54,7 @@ class RTF2PDFGUI:
         self.output_filename = tk.StringVar(value="final_document_with_toc.pdf")
         self.use_section_file = tk.BooleanVar(value=False)
         self.section_file = tk.StringVar(value="")
+        self.refresh_title_cache = tk.BooleanVar(value=False)
         
         # Add PDF settings
         self.page_width = tk.StringVar(value="210")
@@ -118,6 +119,10 @@ class RTF2PDFGUI:
         self.section_file_button = ttk.Button(input_frame, text="Browse", command=self.browse_section_file, state='disabled')
         self.section_file_button.grid(row=3, column=2, padx=5, pady=5)
         
+        # Re-extract titles instead of reusing cached ones
+        ttk.Checkbutton(input_frame, text="Refresh Title Cache",
+                       variable=self.refresh_title_cache).grid(row=4, column=0, sticky=tk.W, padx=5, pady=5)
+        
         # PDF Options
         pdf_frame = ttk.LabelFrame(self.main_frame, text="PDF Options", padding="5")
         pdf_frame.pack(fill=tk.X, pady=5)
@@ -269,7 +274,8 @@ class RTF2PDFGUI:
                 page_width_mm=float(self.page_width.get()),
                 margin_mm=float(self.margin.get()),
                 font_size=float(self.font_size.get()),
-                header_font_size=float(self.header_font_size.get())
+                header_font_size=float(self.header_font_size.get()),
+                refresh_title_cache=self.refresh_title_cache.get()
             )
             
             # Log current GUI state
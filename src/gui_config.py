@@ -34,6 +34,13 @@ class GUIConfig:
     font_size: float = 8.0
     header_font_size: float = 10.0
     
+    # RTF to PDF conversion
+    conversion_workers: int = 1  # Parallel Word instances; 1 converts serially
+    
+    # Title extraction
+    use_title_cache: bool = True  # Reuse titles cached for unchanged RTF files
+    refresh_title_cache: bool = False  # Re-extract every title and refresh the cache
+    
     # Logging
     log_level: str = "INFO"
     log_format: str = "%(asctime)s - %(levelname)s - %(message)s"
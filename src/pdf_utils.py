@@ -1,13 +1,28 @@
 #!/usr/bin/env python3
+import json
 import logging
+import math
+import re
+from collections import namedtuple
+from functools import lru_cache
+from itertools import count, groupby
+from operator import itemgetter
 from pathlib import Path
+import numpy as np
 import pandas as pd
 from fpdf import FPDF
-from pypdf import PdfWriter, PdfReader
 import fitz  # Import PyMuPDF
 
+# Optional imports
+try:
+    import orjson  # Faster (de)serialization of the TOC entry metadata
+except ImportError:
+    orjson = None
+
 # Import the GUI configuration
 from src.gui_config import GUIConfig
+# Bookmarks are ordered with the same key as the documents
+from src.data_processing import section_sort_key, sort_by_section
 
 # Configure logging (can be configured globally in main if preferred)
 # logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
@@ -21,10 +36,89 @@ LINE_HEIGHT = 6
 FONT_SIZE = 8
 HEADER_FONT_SIZE = 10
 # PLACEHOLDER_PAGE_NUM = "XX" # No longer needed
-FONT = 'Arial'
+# fpdf2 maps Arial to its built-in Helvetica (same metrics) on every set_font call; name it directly
+FONT = 'Helvetica'
+
+# Above this many entries, page-number offsets are applied with NumPy instead of a Python loop
+VECTORIZE_MIN_ENTRIES = 1000
+# Outlines larger than this are set with a deeper collapse level
+LARGE_TOC_BOOKMARKS = 5000
+
+# Max layout passes generate_toc_pdf makes while settling on the TOC's page count
+MAX_TOC_LAYOUT_PASSES = 3
+# Max number of memoized string widths kept by CachedFPDF
+STRING_WIDTH_CACHE_SIZE = 4096
+# Section names used by automatic mode ("1  Tables", "2  Figures", "3  Listings")
+AUTO_SECTION_WORDS = frozenset({'tables', 'figures', 'listings'})
+
+# clean_text: control/non-ASCII characters (incl. the non-breaking space), zero-width and
+# Unicode separator/format characters, and the € and ~ markers all become spaces in one pass
+_CLEAN_TEXT_TABLE = dict.fromkeys(
+    [*range(0x00, 0x20), *range(0x7F, 0x100), *range(0x200B, 0x2010), *range(0x2028, 0x2030),
+     *range(0x2060, 0x2070), ord('€'), ord('~')],
+    ' ')
+
+# Manual-mode section header lines start with a number "10.1" through "19.9" ("14.1  Demographic Data")
+_MANUAL_SECTION_HEADER_RE = re.compile(r'1[0-9]\.[1-9]')
 
 # --------------------------------
 
+# Shared across CachedFPDF instances so the calculation and rendering passes reuse widths
+_string_width_cache: dict[tuple, float] = {}
+
+
+class CachedFPDF(FPDF):
+    """FPDF that memoizes get_string_width per (font, style, size, spacing, text).
+
+    FPDF measures strings glyph by glyph in Python; the TOC layout measures the
+    same titles and words repeatedly, so widths are cached across calls.
+    """
+
+    def get_string_width(self, s, normalized=False, markdown=False):
+        if normalized or markdown:
+            # Internal/markdown measurements are rare; don't cache them
+            return super().get_string_width(s, normalized, markdown)
+        key = (self.font_family, self.font_style, self.font_size_pt,
+               getattr(self, 'font_stretching', 100), getattr(self, 'char_spacing', 0), self.k, s)
+        width = _string_width_cache.get(key)
+        if width is None:
+            if len(_string_width_cache) >= STRING_WIDTH_CACHE_SIZE:
+                _string_width_cache.clear()
+            width = _string_width_cache[key] = super().get_string_width(s)
+        return width
+
+# Document bookmark collected while building the outline; field order is the sort order
+BookmarkEntry = namedtuple('BookmarkEntry', 'section stem title page')
+
+# Laid-out TOC line recorded for link creation; written to the JSON sidecar as a dict
+TocEntry = namedtuple('TocEntry', 'toc_page target_page text original_text page_num_str is_header '
+                                  'y_position end_y_position is_multiline first_words',
+                      defaults=(None, False, ''))
+
+
+def _offset_pages(pages, offset: int) -> list[int]:
+    """Returns the given page numbers shifted by offset (e.g. the number of TOC pages)."""
+    if len(pages) > VECTORIZE_MIN_ENTRIES:
+        return (np.asarray(pages, dtype=np.int32) + offset).tolist()
+    return [page + offset for page in pages]
+
+
+def _build_section_bookmarks(entries: list[BookmarkEntry], page_offset: int) -> dict[str, list[list]]:
+    """Sorts entries once by (section, filename) to match TOC order and buckets them per section.
+
+    Returns a dict mapping each section number to its level-3 bookmarks
+    ([3, title, page]), with page numbers shifted by page_offset.
+    """
+    section_entries = {}
+    if not entries:
+        return section_entries
+    sections, _stems, titles, pages = zip(*sorted(entries))
+    pages = _offset_pages(pages, page_offset)
+    for section_number, rows in groupby(zip(sections, titles, pages), key=itemgetter(0)):
+        section_entries[section_number] = [[3, title, page] for _section, title, page in rows]
+    return section_entries
+
+
 # Placeholder: Needs toc_data to include 'filepath' column corresponding to page_map keys
 def generate_toc_pdf(toc_data: pd.DataFrame, page_map: dict[str, int], output_path: Path, config: GUIConfig = None) -> tuple[Path | None, int | None]:
     """Generates a PDF file for the Table of Contents with actual page numbers.
@@ -55,8 +149,9 @@ def generate_toc_pdf(toc_data: pd.DataFrame, page_map: dict[str, int], output_pa
         HEADER_FONT_SIZE = 10
     
     CONTENT_WIDTH_MM = PAGE_WIDTH_MM - 2 * MARGIN_MM
+    PAGE_HEIGHT_MM = 297  # A4 height
     LINE_HEIGHT = 6
-    FONT = 'Arial'
+    FONT = 'Helvetica' # Core font; 'Arial' is substituted with it on every set_font call
     
     logging.info(f"--- Generating Final Table of Contents PDF to {output_path.name} ---")
     if toc_data.empty:
@@ -70,17 +165,16 @@ def generate_toc_pdf(toc_data: pd.DataFrame, page_map: dict[str, int], output_pa
     # Detect if we're in automatic or manual mode by examining section headers
     is_automatic_mode = False
     if not toc_data.empty:
-        # Look for section headers in the TOC data
-        headers = toc_data[toc_data['type'] == 'header']
-        if not headers.empty:
-            # Check if headers follow automatic pattern (e.g., "1  Tables", "2  Figures", "3  Listings")
-            first_header = headers.iloc[0]['text']
-            # Automatic mode headers start with single digit followed by section name
-            if (isinstance(first_header, str) and 
-                len(first_header.split()) >= 2 and 
-                first_header.split()[0].isdigit() and 
-                int(first_header.split()[0]) <= 10):
-                is_automatic_mode = True
+        # Look for the first section header in the TOC data (stops at the first match)
+        first_header = next((text for entry_type, text in zip(toc_data['type'].values, toc_data['text'].values)
+                             if entry_type == 'header'), None)
+        # Check if headers follow automatic pattern (e.g., "1  Tables", "2  Figures", "3  Listings")
+        # Automatic mode headers start with single digit followed by section name
+        if (isinstance(first_header, str) and 
+            len(first_header.split()) >= 2 and 
+            first_header.split()[0].isdigit() and 
+            int(first_header.split()[0]) <= 10):
+            is_automatic_mode = True
     
     # Determine TOC title based on mode
     if is_automatic_mode:
@@ -92,59 +186,33 @@ def generate_toc_pdf(toc_data: pd.DataFrame, page_map: dict[str, int], output_pa
         title_align = 'L'  # Left align for manual mode
         logging.info("Detected manual mode - using ICH-specific title")
 
-    try:
-        # --- First Pass: Calculate TOC page count ---
-        pdf_calc = FPDF(orientation='P', unit='mm', format='A4')
-        pdf_calc.set_auto_page_break(auto=True, margin=MARGIN_MM)
-        pdf_calc.set_margins(left=MARGIN_MM, top=MARGIN_MM, right=MARGIN_MM)
-        pdf_calc.add_page()
-        pdf_calc.set_font(FONT, '', FONT_SIZE)
-        pdf_calc.set_text_color(0, 0, 255)  # Set text color to blue
-        pdf_calc.set_font_size(12)
-        pdf_calc.cell(CONTENT_WIDTH_MM, 10, toc_title, 0, 1, title_align)
-        pdf_calc.ln(5)
-
-        for _, row in toc_data.iterrows():
-            if row['type'] == 'header':
-                pdf_calc.set_font(FONT, 'B', HEADER_FONT_SIZE)
-                pdf_calc.ln(LINE_HEIGHT * 0.25)
-                pdf_calc.multi_cell(CONTENT_WIDTH_MM, LINE_HEIGHT, str(row['text']), 0, 'L')
-                pdf_calc.ln(LINE_HEIGHT * 0.25)
-                pdf_calc.set_font(FONT, '', FONT_SIZE)
-            elif row['type'] == 'entry':
-                # For calculation pass, estimate space needed for wrapped entries
-                pdf_calc.set_font(FONT, '', FONT_SIZE)
-                pdf_calc.set_text_color(0, 0, 255)
-                indent = "  " * (row['level'] - 1)
-                formatted_text = indent + str(row['text'])
-                
-                # Check if text will fit on one line (leaving space for dots and page number)
-                text_width = pdf_calc.get_string_width(formatted_text)
-                page_num_width = pdf_calc.get_string_width("999")  # Estimate
-                reserved_space = page_num_width + 30  # Space for page number and dots
-                
-                if text_width > (CONTENT_WIDTH_MM - reserved_space):
-                    # Text needs wrapping - use multi_cell to calculate height
-                    wrap_width = CONTENT_WIDTH_MM - reserved_space
-                    pdf_calc.multi_cell(wrap_width, LINE_HEIGHT, formatted_text, 0, 'L')
-                    # No need for extra space since dots go on the last line
-                    pdf_calc.ln(LINE_HEIGHT * 0.25)
-                else:
-                    # Single line entry
-                    pdf_calc.cell(CONTENT_WIDTH_MM * 0.8, LINE_HEIGHT, formatted_text, 0, 0)
-                    pdf_calc.cell(CONTENT_WIDTH_MM * 0.2, LINE_HEIGHT, "999", 0, 1, 'R')
-                    pdf_calc.ln(LINE_HEIGHT / 4)
+    # Per-row strings that don't depend on the layout are computed once, before rendering:
+    # entries are indented by level; headers are written as-is
+    # (map(str) rather than astype(str), which keeps missing values as NaN on newer pandas)
+    text_col = toc_data['text'].map(str)
+    indent_col = toc_data['level'].map(lambda level: "  " * (level - 1))
+    formatted_col = text_col.where(toc_data['type'] != 'entry', indent_col + text_col)
 
-        toc_page_count = pdf_calc.page_no()
-        logging.info(f"Calculated TOC will require {toc_page_count} page(s).")
+    # Plain (text, type, filepath, formatted text, cleaned text, first 5 words) tuples;
+    # filepath keys as strings (lowercase 'filepath')
+    toc_rows = list(zip(text_col, toc_data['type'], toc_data['filepath'].map(str), formatted_col,
+                        formatted_col.map(clean_text),
+                        formatted_col.str.split().str[:5].str.join(' ')))  # First 5 words for matching
 
-        # --- Second Pass: Generate actual TOC PDF without links ---
-        pdf = FPDF(orientation='P', unit='mm', format='A4')
+    def render_toc(toc_page_count: int) -> tuple[FPDF, list[TocEntry]]:
+        """Lays out the TOC (without links), assuming it occupies toc_page_count pages."""
+        pdf = CachedFPDF(orientation='P', unit='mm', format='A4')
         pdf.set_auto_page_break(auto=True, margin=MARGIN_MM)
         pdf.set_margins(left=MARGIN_MM, top=MARGIN_MM, right=MARGIN_MM)
         pdf.add_page()
         pdf.set_font(FONT, '', FONT_SIZE) # Use standard font
+        # Narrowest glyph of the entry font: len(text) * this is a lower bound on text width
+        min_char_width = min(pdf.current_font.cw.values()) * pdf.font_size / 1000
         pdf.set_text_color(0, 0, 255)  # Set text color to blue
+        # Dotted leaders are drawn as one dashed line each (fpdf2 keeps these across pages)
+        pdf.set_draw_color(0, 0, 255)
+        pdf.set_line_width(0.2)
+        pdf.set_dash_pattern(dash=0.3, gap=0.8)
 
         # Add TOC Title
         pdf.set_font_size(12)
@@ -152,20 +220,15 @@ def generate_toc_pdf(toc_data: pd.DataFrame, page_map: dict[str, int], output_pa
         pdf.ln(5)
 
         # Write TOC Entries without links - we'll add them in the final document
-        dot_char = "."
-        dot_width = pdf.get_string_width(dot_char)
-        max_page_num_str = str(len(page_map) * 10 + toc_page_count) # Estimate max page num width reasonably
-        page_num_width = pdf.get_string_width(max_page_num_str) + 1 # Add small buffer
+        leader_y_offset = LINE_HEIGHT * 0.6 # Leaders sit just above the text baseline, like dots
+
+        # Page-number widths by digit count; digits share one advance width in the TOC font
+        digit_widths = {}
 
         # Store TOC entry info for later link creation
         toc_entries = []
 
-        for _, row in toc_data.iterrows():
-            level = row['level']
-            text = str(row['text']) # Ensure text is string
-            entry_type = row['type']
-            file_path_key = str(row['filepath']) # Ensure key is string, use lowercase 'filepath'
-
+        for text, entry_type, file_path_key, formatted_text, cleaned_text, first_words in toc_rows:
             if entry_type == 'header':
                 pdf.set_font(FONT, 'B', HEADER_FONT_SIZE) # Bold for headers
                 pdf.set_text_color(0, 0, 0)  # Black color for headers
@@ -176,24 +239,19 @@ def generate_toc_pdf(toc_data: pd.DataFrame, page_map: dict[str, int], output_pa
                 
                 # Store header information for use in bookmark creation
                 # Headers don't have target pages in content, but we'll record their position in TOC
-                # Clean text before storing
-                clean_header_text = clean_text(text)
-                
-                toc_entries.append({
-                    'toc_page': pdf.page_no(),
-                    'target_page': None,  # No target for headers
-                    'text': clean_header_text,
-                    'original_text': text,  # Keep original for debugging
-                    'page_num_str': '',
-                    'is_header': True,
-                    'y_position': pdf.get_y()  # Store y position
-                })
+                toc_entries.append(TocEntry(
+                    toc_page=pdf.page_no(),
+                    target_page=None,  # No target for headers
+                    text=cleaned_text,
+                    original_text=text,  # Keep original for debugging
+                    page_num_str='',
+                    is_header=True,
+                    y_position=pdf.get_y()  # Store y position
+                ))
 
             elif entry_type == 'entry':
                 pdf.set_font(FONT, '', FONT_SIZE) # Ensure normal font for entries
                 pdf.set_text_color(0, 0, 255)  # Blue color for entries
-                indent = "  " * (level - 1)
-                formatted_text = indent + text
 
                 # Get original page number and calculate final page number
                 original_page_num = page_map.get(file_path_key)
@@ -205,17 +263,28 @@ def generate_toc_pdf(toc_data: pd.DataFrame, page_map: dict[str, int], output_pa
                     final_page_num = original_page_num + toc_page_count
                     final_page_num_str = str(final_page_num)
 
-                # Calculate if text needs wrapping
-                text_width = pdf.get_string_width(formatted_text)
-                current_page_num_width = pdf.get_string_width(final_page_num_str)
+                if final_page_num_str.isdigit():
+                    num_digits = len(final_page_num_str)
+                    current_page_num_width = digit_widths.get(num_digits)
+                    if current_page_num_width is None:
+                        current_page_num_width = digit_widths[num_digits] = pdf.get_string_width('9' * num_digits)
+                else:
+                    current_page_num_width = pdf.get_string_width(final_page_num_str)
                 # Reserve space for page number and some dots
                 reserved_space = current_page_num_width + 30  # Increased buffer for dots
                 
+                # Calculate if text needs wrapping; titles too long to fit even in the
+                # narrowest glyph wrap without measuring (only single lines need the width)
+                needs_wrap = len(formatted_text) * min_char_width > (CONTENT_WIDTH_MM - reserved_space)
+                if not needs_wrap:
+                    text_width = pdf.get_string_width(formatted_text)
+                    needs_wrap = text_width > (CONTENT_WIDTH_MM - reserved_space)
+                
                 # Store the starting position for hyperlink creation
                 start_y = pdf.get_y()
                 start_page = pdf.page_no()
                 
-                if text_width > (CONTENT_WIDTH_MM - reserved_space):
+                if needs_wrap:
                     # Text needs wrapping
                     logging.debug(f"Wrapping long title: {formatted_text[:50]}...")
                     
@@ -229,26 +298,24 @@ def generate_toc_pdf(toc_data: pd.DataFrame, page_map: dict[str, int], output_pa
                     # Get position after multi_cell
                     after_text_y = pdf.get_y()
                     
-                    # For wrapped text, we need to find where the last line ends
-                    # Split the text into words and estimate the last line
-                    words = formatted_text.split()
-                    last_line_text = ""
-                    temp_text = ""
-                    
-                    # Build lines word by word to find what's on the last line
-                    for word in words:
-                        test_text = temp_text + " " + word if temp_text else word
-                        if pdf.get_string_width(test_text) <= wrap_width:
-                            temp_text = test_text
+                    # For wrapped text, we need to find where the last line ends.
+                    # Greedy-wrap the words once using per-word widths, the way multi_cell
+                    # does (indent on the first line, cell padding on both sides); the
+                    # running width of the final line is the last line's text width.
+                    space_width = pdf.get_string_width(" ")
+                    line_limit = wrap_width - 2 * pdf.c_margin
+                    last_line_text_width = pdf.get_string_width(formatted_text[:len(formatted_text) - len(formatted_text.lstrip())])
+                    line_has_words = False
+                    for word in formatted_text.split():
+                        word_width = pdf.get_string_width(word)
+                        if not line_has_words:
+                            last_line_text_width += word_width
+                            line_has_words = True
+                        elif last_line_text_width + space_width + word_width <= line_limit:
+                            last_line_text_width += space_width + word_width
                         else:
-                            last_line_text = temp_text
-                            temp_text = word
-                    # Don't forget the remaining text
-                    if temp_text:
-                        last_line_text = temp_text
-                    
-                    # Calculate where the last line of text ends
-                    last_line_text_width = pdf.get_string_width(last_line_text)
+                            # Word starts a new line
+                            last_line_text_width = word_width
                     
                     # Move to the last line
                     pdf.set_y(after_text_y - LINE_HEIGHT)
@@ -257,43 +324,37 @@ def generate_toc_pdf(toc_data: pd.DataFrame, page_map: dict[str, int], output_pa
                     # Add a small gap after the text
                     gap_width = 5  # 5mm gap between text and dots
                     
-                    # Position after the last line text plus gap
-                    text_end_x = MARGIN_MM + last_line_text_width + gap_width
+                    # Position after the last line text (drawn inside the cell padding) plus gap
+                    text_end_x = MARGIN_MM + pdf.c_margin + last_line_text_width + gap_width
                     
                     # Calculate space for dots from text end to page number
-                    available_for_dots = CONTENT_WIDTH_MM - last_line_text_width - current_page_num_width - gap_width
+                    available_for_dots = MARGIN_MM + CONTENT_WIDTH_MM - current_page_num_width - text_end_x
                     
-                    if available_for_dots > 0 and dot_width > 0:
-                        num_dots = int(available_for_dots / dot_width)
-                        dots = dot_char * num_dots
-                        
-                        # Position at the end of text plus gap
-                        pdf.set_x(text_end_x)
-                        # Add dots
-                        pdf.cell(available_for_dots, LINE_HEIGHT, dots, 0, 0, 'R')
-                    else:
-                        # No room for dots, just add page number
-                        pdf.set_x(MARGIN_MM + CONTENT_WIDTH_MM - current_page_num_width)
+                    if available_for_dots > pdf.c_margin:
+                        # Draw the leader from the end of text plus gap up to the page number
+                        leader_y = pdf.get_y() + leader_y_offset
+                        pdf.line(text_end_x, leader_y, text_end_x + available_for_dots - pdf.c_margin, leader_y)
+                    
+                    # Page number is right-aligned at the end of the line
+                    pdf.set_x(MARGIN_MM + CONTENT_WIDTH_MM - current_page_num_width)
                     
                     # Add page number at the end
                     pdf.cell(current_page_num_width, LINE_HEIGHT, final_page_num_str, 0, 1, 'R')
                     
                     # Store entry info with multi-line flag
                     if final_page_num is not None:
-                        clean_formatted_text = clean_text(formatted_text)
-                        
-                        toc_entries.append({
-                            'toc_page': start_page,
-                            'target_page': final_page_num,
-                            'text': clean_formatted_text,
-                            'original_text': formatted_text,
-                            'page_num_str': final_page_num_str,
-                            'is_header': False,
-                            'y_position': start_y,
-                            'end_y_position': pdf.get_y(),
-                            'is_multiline': True,
-                            'first_words': ' '.join(formatted_text.split()[:5])  # Store first 5 words for matching
-                        })
+                        toc_entries.append(TocEntry(
+                            toc_page=start_page,
+                            target_page=final_page_num,
+                            text=cleaned_text,
+                            original_text=formatted_text,
+                            page_num_str=final_page_num_str,
+                            is_header=False,
+                            y_position=start_y,
+                            end_y_position=pdf.get_y(),
+                            is_multiline=True,
+                            first_words=first_words  # Store first 5 words for matching
+                        ))
                     
                 else:
                     # Single line entry - improved logic
@@ -303,46 +364,64 @@ def generate_toc_pdf(toc_data: pd.DataFrame, page_map: dict[str, int], output_pa
                     # Calculate available space for dots with gap
                     available_dots_width = CONTENT_WIDTH_MM - text_width - current_page_num_width - gap_width
 
-                    dots = ""
-                    if available_dots_width > 0 and dot_width > 0:
-                        num_dots = int(available_dots_width / dot_width)
-                        dots = dot_char * num_dots
-
                     # Record this entry's info
                     if final_page_num is not None:
-                        clean_formatted_text = clean_text(formatted_text)
-                        
-                        toc_entries.append({
-                            'toc_page': pdf.page_no(),
-                            'target_page': final_page_num,
-                            'text': clean_formatted_text,
-                            'original_text': formatted_text,
-                            'page_num_str': final_page_num_str,
-                            'is_header': False,
-                            'y_position': start_y,
-                            'end_y_position': start_y + LINE_HEIGHT,
-                            'is_multiline': False,
-                            'first_words': ' '.join(formatted_text.split()[:5])
-                        })
+                        toc_entries.append(TocEntry(
+                            toc_page=pdf.page_no(),
+                            target_page=final_page_num,
+                            text=cleaned_text,
+                            original_text=formatted_text,
+                            page_num_str=final_page_num_str,
+                            is_header=False,
+                            y_position=start_y,
+                            end_y_position=start_y + LINE_HEIGHT,
+                            is_multiline=False,
+                            first_words=first_words
+                        ))
 
                     # Add cells with gap
                     pdf.cell(text_width, LINE_HEIGHT, formatted_text, 0, 0)
                     pdf.cell(gap_width, LINE_HEIGHT, "", 0, 0)  # Gap between text and dots
-                    pdf.cell(available_dots_width, LINE_HEIGHT, dots, 0, 0, 'R')
+                    if available_dots_width > pdf.c_margin:
+                        leader_x = pdf.get_x()
+                        leader_y = pdf.get_y() + leader_y_offset
+                        pdf.line(leader_x, leader_y, leader_x + available_dots_width - pdf.c_margin, leader_y)
+                    pdf.cell(available_dots_width, LINE_HEIGHT, "", 0, 0)  # Space taken by the leader
                     pdf.cell(current_page_num_width, LINE_HEIGHT, final_page_num_str, 0, 1, 'R')
                 
                 pdf.ln(LINE_HEIGHT / 4) # Keep small space between entries
 
+        return pdf, toc_entries
+
+    try:
+        # Target page numbers depend on the TOC's own length. Lay it out once using an
+        # estimated page count and only re-render if the estimate turns out wrong.
+        rows_per_page = (PAGE_HEIGHT_MM - 2 * MARGIN_MM) / (LINE_HEIGHT * 1.25)
+        toc_page_count = max(1, math.ceil((len(toc_data) + 3) / rows_per_page))
+        for _ in range(MAX_TOC_LAYOUT_PASSES):
+            pdf, toc_entries = render_toc(toc_page_count)
+            if pdf.page_no() == toc_page_count:
+                break
+            logging.info(f"TOC needs {pdf.page_no()} page(s), not the estimated {toc_page_count}; re-rendering.")
+            toc_page_count = pdf.page_no()
+        else:
+            logging.warning(f"TOC page count did not settle after {MAX_TOC_LAYOUT_PASSES} passes; page numbers may be off.")
+        logging.info(f"TOC requires {toc_page_count} page(s).")
+
         # --- Save PDF ---
         output_path.parent.mkdir(parents=True, exist_ok=True) # Ensure output dir exists
-        pdf.output(str(output_path), "F")
+        with open(output_path, 'wb') as f:
+            f.write(pdf.output()) # output() with no name returns the document as a bytearray
         logging.info(f"Successfully generated TOC PDF: {output_path} with {len(toc_entries)} entries")
         
         # Create a metadata file with TOC entries for later link creation
         toc_info_path = output_path.with_suffix('.json')
-        import json
-        with open(toc_info_path, 'w') as f:
-            json.dump(toc_entries, f)
+        toc_records = [entry._asdict() for entry in toc_entries]
+        if orjson is not None:
+            toc_info_path.write_bytes(orjson.dumps(toc_records))
+        else:
+            with open(toc_info_path, 'w') as f:
+                json.dump(toc_records, f)
         logging.debug(f"Saved TOC entry information to {toc_info_path}")
         
         # Return the actual page count of the generated TOC
@@ -389,68 +468,64 @@ def combine_pdfs(final_df: pd.DataFrame, output_pdf_folder: Path, output_path: P
     # Ensure final_df is sorted by section_number then filename_stem (same as TOC and bookmarks)
     if 'section_number' in final_df.columns and 'filename_stem' in final_df.columns:
         logging.info("Sorting PDFs to match TOC and bookmark order...")
-        final_df = final_df.sort_values(by=['section_number', 'filename_stem'])
+        final_df = sort_by_section(final_df)
         logging.info(f"Sorted {len(final_df)} files by section_number and filename_stem")
 
-    writer = PdfWriter()
-    page_map = {}
-    current_page_number = 0 # 0-based index for PyPDF outline/pages
+    # Pages are copied with PyMuPDF's insert_pdf, which copies objects in C
+    combined = fitz.open()
+    # Appended files and their page counts, in order; start pages are derived afterwards
+    appended_paths = []
+    appended_page_counts = []
+    debug_enabled = logging.getLogger().isEnabledFor(logging.DEBUG)
 
     try:
-        for index, row in final_df.iterrows():
-            file_path_str = str(row['filepath'])
+        for file_path_str in final_df['filepath'].map(str):
             pdf_filename = Path(file_path_str).name.replace('.rtf', '.pdf') # Assume conversion replaces ext
             pdf_file_to_combine = output_pdf_folder / pdf_filename
-            # Use lowercase 'title' for bookmark
-            base_title = str(row['title']) # Bookmark title
-            filename_stem = Path(file_path_str).stem # Get stem for uniqueness
-            
-            # Clean the title text
-            base_title = clean_text(base_title)
-            bookmark_title = f"{base_title} ({filename_stem})" # Make title unique
 
             if not pdf_file_to_combine.is_file():
                 logging.warning(f"PDF file not found: {pdf_file_to_combine}. Skipping.")
                 continue # Or handle as error depending on requirements
 
             try:
-                reader = PdfReader(str(pdf_file_to_combine))
-                num_pages = len(reader.pages)
-                if num_pages == 0:
-                     logging.warning(f"PDF file {pdf_filename} has 0 pages. Skipping.")
-                     continue
+                with fitz.open(str(pdf_file_to_combine)) as src:
+                    num_pages = src.page_count
+                    if num_pages == 0:
+                         logging.warning(f"PDF file {pdf_filename} has 0 pages. Skipping.")
+                         continue
 
-                # Append the pages from the current PDF
-                writer.append(str(pdf_file_to_combine))
+                    # Append the pages from the current PDF
+                    combined.insert_pdf(src)
 
-                # Store the 1-based starting page number for TOC generation
                 # Use the original filepath (lowercase) from the dataframe as the key
-                page_map[file_path_str] = current_page_number + 1
-                
-                # Special logging for FEFOS01A
-                if "fefos01a" in file_path_str.lower():
-                    logging.info(f"FEFOS01A page mapping: {file_path_str} -> page {current_page_number + 1}")
+                appended_paths.append(file_path_str)
+                appended_page_counts.append(num_pages)
 
-                # Update the current page number for the next iteration
-                current_page_number += num_pages
-
-                logging.debug(f"Appended {pdf_filename} ({num_pages} pages). Current total pages: {current_page_number}.")
+                if debug_enabled:
+                    logging.debug(f"Appended {pdf_filename} ({num_pages} pages). Current total pages: {combined.page_count}.")
 
             except Exception as append_err:
                 logging.error(f"Failed to process or append {pdf_filename}: {append_err}")
                 # Decide whether to abort or continue
-                # writer.close() # Close writer if aborting
-                # return None, None # Abort
 
-        if current_page_number == 0:
+        # Store the 1-based starting page number of each file for TOC generation
+        page_counts = np.asarray(appended_page_counts, dtype=np.int64)
+        start_pages = (np.cumsum(page_counts) - page_counts + 1).tolist()
+        page_map = dict(zip(appended_paths, start_pages))
+
+        # Special logging for FEFOS01A
+        for file_path_str, start_page in page_map.items():
+            if "fefos01a" in file_path_str.lower():
+                logging.info(f"FEFOS01A page mapping: {file_path_str} -> page {start_page}")
+
+        if combined.page_count == 0:
             logging.error("No pages were added to the combined PDF. Aborting.")
-            writer.close()
             return None, None
 
-        # Write the combined PDF (without TOC)
+        # Write the combined PDF (without TOC); garbage collection also deduplicates
+        # fonts/images shared between the source PDFs
         output_path.parent.mkdir(parents=True, exist_ok=True) # Ensure output dir exists
-        with open(output_path, "wb") as fp:
-            writer.write(fp)
+        combined.save(str(output_path), garbage=3, deflate=True)
         logging.info(f"Successfully combined {len(page_map)} PDFs into {output_path}")
         return output_path, page_map
 
@@ -458,13 +533,195 @@ def combine_pdfs(final_df: pd.DataFrame, output_pdf_folder: Path, output_path: P
         logging.error(f"Failed to combine PDFs: {merge_err}", exc_info=True)
         return None, None
     finally:
-        writer.close() # Ensure the writer is closed
+        combined.close() # Ensure the document is closed
+
+
+def _toc_page_lines(page: fitz.Page) -> list[tuple[str, str, tuple]]:
+    """Extracts a TOC page's text lines once as (text, stripped text, bbox), in reading order."""
+    # Word tuples (x0, y0, x1, y1, word, block_no, line_no, word_no) avoid building the
+    # per-span dicts of get_text("dict"); grouping them by (block_no, line_no) recovers
+    # each line with its own bbox. Image blocks are never matched, so they are left out.
+    words = page.get_text("words", flags=fitz.TEXTFLAGS_WORDS & ~fitz.TEXT_PRESERVE_IMAGES)
+    page_lines = []
+    for _, line_words in groupby(words, key=itemgetter(5, 6)):
+        line_words = list(line_words)
+        line_text = " ".join(word[4] for word in line_words)
+        first, last = line_words[0], line_words[-1]
+        bbox = (first[0], min(word[1] for word in line_words),
+                last[2], max(word[3] for word in line_words))
+        page_lines.append((line_text, line_text, bbox))
+    return page_lines
+
 
+def _y_overlap(a: tuple, b: tuple) -> bool:
+    """Whether two (x0, y0, x1, y1) boxes overlap vertically."""
+    return a[1] < b[3] and b[1] < a[3]
 
-def prepend_toc_to_pdf(toc_pdf_path: Path, content_pdf_path: Path, final_output_path: Path, final_df: pd.DataFrame, page_map: dict[str, int]) -> Path | None:
+
+def _index_toc_lines(page_lines: list[tuple[str, str, tuple]], skip_line) -> tuple[list, dict[str, list[int]], dict[str, int]]:
+    """Indexes a TOC page's lines for hyperlink matching.
+
+    Page numbers are right-aligned at the end of their entry's last line, so the lines
+    reaching furthest right on the page are the ones that end an entry.
+
+    Args:
+        page_lines: The page's lines from _toc_page_lines.
+        skip_line: Predicate (stripped text, bbox) -> bool for lines that never get a
+                   link (main title, section headers).
+
+    Returns:
+        A tuple of (lines, by_page_num, by_first_words): lines is the list of kept
+        (text, stripped text, bbox) lines; by_page_num maps a page number to the
+        positions of the lines ending with it; by_first_words maps the first five
+        words of a line to the position of the first line starting with them.
+    """
+    lines = [line for line in page_lines if not skip_line(line[1], line[2])]
+    by_page_num = {}
+    by_first_words = {}
+    for pos, (_, stripped, _) in enumerate(lines):
+        by_first_words.setdefault(' '.join(stripped.split()[:5]), pos)
+    if lines:
+        page_num_x1 = max(bbox[2] for _, _, bbox in lines) - 0.5 # Small tolerance for rounding
+        for pos, (_, stripped, bbox) in enumerate(lines):
+            if bbox[2] >= page_num_x1:
+                page_num = stripped[len(stripped.rstrip('0123456789')):]
+                if page_num:
+                    by_page_num.setdefault(page_num, []).append(pos)
+    return lines, by_page_num, by_first_words
+
+
+def _find_toc_entry_span(entry: dict, line_index: tuple) -> tuple[float, float] | None:
+    """Returns the (y0, y1) span of a TOC entry's line(s), or None if it isn't on the page.
+
+    Only the vertical extent is needed: links are widened to the full text width.
+    """
+    lines, by_page_num, by_first_words = line_index
+    end_positions = by_page_num.get(entry['page_num_str'])
+    if not end_positions:
+        return None
+    end = end_positions[0]
+    start = None
+    if entry.get('is_multiline', False) and entry.get('first_words'):
+        # A wrapped entry spans from the line starting with its first words to the
+        # first line after it ending with its page number
+        start = by_first_words.get(entry['first_words'])
+        if start is not None:
+            end = next((pos for pos in end_positions if pos > start), None)
+            if end is None:
+                start, end = None, end_positions[0]
+    if start is None:
+        bbox = lines[end][2]
+        return bbox[1], bbox[3]
+    y0 = min(bbox[1] for _, _, bbox in lines[start:end + 1])
+    y1 = max(bbox[3] for _, _, bbox in lines[start:end + 1])
+    return y0, y1
+
+
+def _insert_toc_links(doc: fitz.Document, toc_entries: list[dict], line_index: dict[int, tuple], mode: str) -> None:
+    """Links each TOC entry's line(s) to its target page.
+
+    Args:
+        doc: The merged document, TOC pages first.
+        toc_entries: Entry records from the TOC JSON sidecar.
+        line_index: Maps a 0-based TOC page index to its _index_toc_lines result.
+        mode: "automatic" or "manual", for log messages.
+    """
+    # Checked once so the per-entry messages are only formatted when they'd be emitted
+    root_logger = logging.getLogger()
+    debug_enabled = root_logger.isEnabledFor(logging.DEBUG)
+    info_enabled = root_logger.isEnabledFor(logging.INFO)
+    links_by_page = {}
+    # Right edge of the link area per TOC page, read from the page once
+    link_right_by_page = {}
+    for entry in toc_entries:
+        # Skip header entries - they don't get hyperlinks in the TOC
+        if entry.get('is_header', False):
+            if debug_enabled:
+                logging.debug(f"Skipping link creation for header: {entry['text']}")
+            continue
+            
+        # Skip entries with no target page
+        if entry.get('target_page') is None:
+            if debug_enabled:
+                logging.debug(f"Skipping link creation for entry with no target page: {entry['text']}")
+            continue
+            
+        toc_page_idx = entry['toc_page'] - 1  # Convert 1-based to 0-based
+        target_page_idx = entry['target_page'] - 1  # Convert 1-based to 0-based
+        page_num_str = entry['page_num_str']
+
+        # Find the line(s) with this entry
+        entry_span = _find_toc_entry_span(entry, line_index[toc_page_idx])
+        if entry_span is None:
+            continue
+        entry_y0, entry_y1 = entry_span
+
+        # Create hyperlink for the entire entry
+        link_right = link_right_by_page.get(toc_page_idx)
+        if link_right is None:
+            link_right = link_right_by_page[toc_page_idx] = doc[toc_page_idx].rect.width - MARGIN_MM
+        expanded_rect = fitz.Rect(
+            MARGIN_MM,
+            entry_y0,
+            link_right,
+            entry_y1
+        )
+        links_by_page.setdefault(toc_page_idx, []).append((expanded_rect, target_page_idx))
+        
+        if entry.get('is_multiline', False):
+            if info_enabled:
+                logging.info(f"Added multi-line link for {mode} mode entry ending with page {page_num_str}")
+        elif debug_enabled:
+            logging.debug(f"Added {mode} mode link from TOC page {toc_page_idx+1} to target page {target_page_idx+1}")
+
+    # Links are written per page in one batch
+    for toc_page_idx, links in links_by_page.items():
+        _add_goto_links(doc[toc_page_idx], links)
+
+
+def _add_goto_links(page: fitz.Page, links: list[tuple[fitz.Rect, int]]) -> None:
+    """Adds (rect, 0-based target page) GoTo links to a page in a single /Annots update.
+
+    page.insert_link re-reads the page's existing annotations to name each new link,
+    which is quadratic in the number of links on a page. The link objects here are
+    the same ones insert_link writes, named in one pass. This relies on PyMuPDF
+    internals (Page._addAnnot_FromString, TOOLS.set_annot_stem), so requirements.txt
+    pins a checked range and tests/test_goto_links.py compares the result with
+    insert_link; versions without _addAnnot_FromString fall back to insert_link.
+    """
+    add_annots = getattr(page, "_addAnnot_FromString", None)
+    if add_annots is None:
+        for rect, target_page_idx in links:
+            page.insert_link({"kind": fitz.LINK_GOTO, "from": rect, "page": target_page_idx, "zoom": 0})
+        return
+
+    doc = page.parent
+    ictm = ~page.transformation_matrix
+    taken = {annot_id for _, annot_type, annot_id in page.annot_xrefs() if annot_type == fitz.PDF_ANNOT_LINK}
+    stem = fitz.TOOLS.set_annot_stem() + "-L"
+    names = (name for name in map(f"{stem}{{}}".format, count()) if name not in taken)
+    destinations = {}
+    annots = []
+    for (rect, target_page_idx), name in zip(links, names):
+        destination = destinations.get(target_page_idx)
+        if destination is None:
+            # Top-left corner of the target page, in PDF coordinates
+            dest_point = fitz.Point(0, 0) * ~doc[target_page_idx].transformation_matrix
+            destination = destinations[target_page_idx] = (
+                f"{doc.page_xref(target_page_idx)} 0 R/XYZ {dest_point.x:.9g} {dest_point.y:.9g} 0")
+        x0, y0, x1, y1 = rect * ictm
+        annots.append(f"<</A<</S/GoTo/D[{destination}]>>/Rect[{x0:.9g} {y0:.9g} {x1:.9g} {y1:.9g}]"
+                      f"/BS<</W 0>>/Subtype/Link/NM({name})>>")
+    add_annots(tuple(annots))
+
+
+def prepend_toc_to_pdf(toc_pdf_path: Path, content_pdf_path: Path, final_output_path: Path, final_df: pd.DataFrame, page_map: dict[str, int],
+                       build_bookmarks: bool = True, garbage: int = 4, deflate: bool = True,
+                       deflate_images: bool | None = None, compression_effort: int = 0) -> Path | None:
     """Merges the TOC PDF and the main content PDF using PyMuPDF (fitz).
     
-    This uses a simpler approach to avoid incompatibility issues between links.
+    Both PDFs are merged in a single PyMuPDF document, which then gets the TOC
+    links and bookmarks and is saved once.
     
     Args:
         toc_pdf_path: Path to the generated TOC PDF.
@@ -473,11 +730,25 @@ def prepend_toc_to_pdf(toc_pdf_path: Path, content_pdf_path: Path, final_output_
         final_df: DataFrame containing the sorted order, 'filepath', and 'title' for bookmarks.
         page_map: Dictionary mapping filepath strings to their 1-based starting page
                   number in the content_pdf (before TOC is prepended).
+        build_bookmarks: If False, skip building the hierarchical bookmark outline
+                         entirely (TOC hyperlinks are still created).
+        garbage: PyMuPDF garbage collection level for the final save. 4 (default) also
+                 deduplicates objects for the smallest file; 1 only drops unused objects
+                 and saves much faster for very large documents.
+        deflate: Whether to compress uncompressed streams (including image and font
+                 streams) in the final save.
+        deflate_images: Whether to compress uncompressed image streams; defaults to
+                        deflate. False skips images, which are rarely worth recompressing.
+        compression_effort: PyMuPDF compression effort (1-100, 0 = library default).
+                            Lower values save faster at a small size cost. Non-zero
+                            values need PyMuPDF 1.24 or later; 0 works on any version.
 
     Returns:
         The path to the final PDF if successful, None otherwise.
     """
     logging.info(f"--- Prepending TOC ({toc_pdf_path.name}) to Content ({content_pdf_path.name}) ---")
+    # Per-line and per-section messages below are only formatted when INFO is enabled
+    info_enabled = logging.getLogger().isEnabledFor(logging.INFO)
 
     try:
         # Detect if we're in automatic or manual mode by examining section numbers
@@ -490,39 +761,33 @@ def prepend_toc_to_pdf(toc_pdf_path: Path, content_pdf_path: Path, final_output_
         mode_name = "Automatic" if is_automatic_mode else "Manual"
         logging.info(f"Detected {mode_name} section mode for hyperlink creation")
 
-        # Use PyPDF to combine PDFs (simpler, more reliable)
-        merger = PdfWriter()
+        # Merge directly in PyMuPDF, which also adds the links and bookmarks below
+        doc = fitz.open()
         
         # Add TOC PDF
-        merger.append(str(toc_pdf_path))
-        num_toc_pages = len(PdfReader(str(toc_pdf_path)).pages)
+        with fitz.open(str(toc_pdf_path)) as toc_doc:
+            num_toc_pages = toc_doc.page_count
+            doc.insert_pdf(toc_doc)
         logging.debug(f"Added TOC PDF with {num_toc_pages} pages")
         
         # Add content PDF
-        merger.append(str(content_pdf_path))
-        num_content_pages = len(PdfReader(str(content_pdf_path)).pages)
+        with fitz.open(str(content_pdf_path)) as content_doc:
+            num_content_pages = content_doc.page_count
+            doc.insert_pdf(content_doc)
         logging.debug(f"Added content PDF with {num_content_pages} pages")
         
-        # Create temporary merged PDF
-        temp_merged_path = final_output_path.with_name(f"temp_{final_output_path.name}")
-        with open(temp_merged_path, "wb") as f:
-            merger.write(f)
-        merger.close()
-        logging.debug(f"Created temporary merged PDF at {temp_merged_path}")
-        
-        # Now use PyMuPDF to add links and bookmarks
-        doc = fitz.open(str(temp_merged_path))
-        
         # Try to load TOC entry information from JSON file
         toc_info_path = toc_pdf_path.with_suffix('.json')
         toc_entries = []
         if toc_info_path.exists():
-            import json
             try:
-                with open(toc_info_path, 'r') as f:
-                    toc_entries = json.load(f)
+                if orjson is not None:
+                    toc_entries = orjson.loads(toc_info_path.read_bytes())
+                else:
+                    with open(toc_info_path, 'r') as f:
+                        toc_entries = json.load(f)
                 logging.debug(f"Loaded {len(toc_entries)} TOC entries from {toc_info_path}")
-            except json.JSONDecodeError:
+            except json.JSONDecodeError: # orjson.JSONDecodeError is a subclass
                 logging.error(f"Failed to load TOC entry information from {toc_info_path}")
         
         # If we have TOC entries, create links
@@ -539,6 +804,9 @@ def prepend_toc_to_pdf(toc_pdf_path: Path, content_pdf_path: Path, final_output_
             
             # Initialize variables that will be used later in bookmark generation
             main_title_line = None
+
+            # Extract each TOC page's text lines once; inserting links doesn't change them
+            toc_page_lines = {i: _toc_page_lines(doc[i]) for i in range(num_toc_pages)}
             
             # Create hyperlinks using mode-specific logic
             if is_automatic_mode:
@@ -547,138 +815,38 @@ def prepend_toc_to_pdf(toc_pdf_path: Path, content_pdf_path: Path, final_output_
                 
                 # Find main title line for bookmark generation
                 for page_idx in range(min(num_toc_pages, 3)):  # Check first 3 pages max
-                    page = doc[page_idx]
-                    text_blocks = page.get_text("dict")["blocks"]
-                    for block in text_blocks:
-                        for line in block.get("lines", []):
-                            line_text = "".join(span.get("text", "") for span in line.get("spans", []))
-                            line_text_stripped = line_text.strip()
-                            
-                            # Check for main title
-                            if (line_text_stripped.startswith("14. TABLES") or 
-                                "TABLES, FIGURES AND GRAPHS" in line_text_stripped or
-                                line_text_stripped == "Table of Contents"):
-                                main_title_line = {
-                                    'page': page_idx,
-                                    'rect': fitz.Rect(line["bbox"]),
-                                    'text': line_text_stripped
-                                }
-                                logging.info(f"Identified main title on page {page_idx+1}: '{line_text_stripped}'")
-                                break
-                        if main_title_line:  # Break out of outer loop too
+                    for line_text, line_text_stripped, bbox in toc_page_lines[page_idx]:
+                        # Check for main title
+                        if (line_text_stripped.startswith("14. TABLES") or 
+                            "TABLES, FIGURES AND GRAPHS" in line_text_stripped or
+                            line_text_stripped == "Table of Contents"):
+                            main_title_line = {
+                                'page': page_idx,
+                                'bbox': bbox,
+                                'text': line_text_stripped
+                            }
+                            logging.info(f"Identified main title on page {page_idx+1}: '{line_text_stripped}'")
                             break
                     if main_title_line:  # Break out of page loop
                         break
                 
-                for entry in toc_entries:
-                    # Skip header entries - they don't get hyperlinks in the TOC
-                    if entry.get('is_header', False):
-                        logging.debug(f"Skipping link creation for header: {entry['text']}")
-                        continue
-                        
-                    # Skip entries with no target page
-                    if entry.get('target_page') is None:
-                        logging.debug(f"Skipping link creation for entry with no target page: {entry['text']}")
-                        continue
-                        
-                    toc_page_idx = entry['toc_page'] - 1  # Convert 1-based to 0-based
-                    target_page_idx = entry['target_page'] - 1  # Convert 1-based to 0-based
-                    
-                    # Get the page
-                    page = doc[toc_page_idx]
-                    
-                    # Enhanced matching for wrapped titles
-                    is_multiline = entry.get('is_multiline', False)
-                    page_num_str = entry['page_num_str']
-                    first_words = entry.get('first_words', '')
-                    
-                    # Find the line(s) with this entry
-                    text_blocks = page.get_text("dict")["blocks"]
-                    entry_found = False
-                    entry_rect = None
-                    
-                    for block in text_blocks:
-                        for line in block.get("lines", []):
-                            line_text = "".join(span.get("text", "") for span in line.get("spans", []))
-                            line_text_stripped = line_text.strip()
-                            
-                            # Skip section headers in automatic mode
-                            if (len(line_text_stripped.split()) >= 2 and
-                                line_text_stripped.split()[0].isdigit() and
-                                any(word.lower() in ['tables', 'figures', 'listings'] for word in line_text_stripped.split()[1:])):
-                                continue
-                            
-                            # Skip main title
-                            if ("TABLES, FIGURES AND GRAPHS" in line_text_stripped or
-                                line_text_stripped == "Table of Contents"):
-                                continue
-                            
-                            # For multi-line entries, match by first words or page number
-                            if is_multiline:
-                                # Check if this line contains the beginning of our entry
-                                if first_words and first_words in line_text:
-                                    # This is the start of our multi-line entry
-                                    entry_rect = fitz.Rect(line["bbox"])
-                                    entry_found = True
-                                    logging.debug(f"Found start of multi-line entry: '{line_text_stripped[:50]}...'")
-                                # Or check if it's a line with just dots and page number
-                                elif page_num_str in line_text and ('.' * 3) in line_text and line_text.strip().endswith(page_num_str):
-                                    # This is the end line with page number
-                                    if entry_rect:
-                                        # Expand rect to include this line
-                                        entry_rect = entry_rect | fitz.Rect(line["bbox"])
-                                    else:
-                                        entry_rect = fitz.Rect(line["bbox"])
-                                    
-                                    # Create hyperlink for the entire multi-line entry
-                                    expanded_rect = fitz.Rect(
-                                        MARGIN_MM,
-                                        entry_rect.y0,
-                                        page.rect.width - MARGIN_MM,
-                                        entry_rect.y1
-                                    )
-                                    
-                                    page.insert_link({
-                                        "kind": fitz.LINK_GOTO,
-                                        "from": expanded_rect,
-                                        "page": target_page_idx,
-                                        "zoom": 0
-                                    })
-                                    
-                                    logging.info(f"Added multi-line link for entry ending with page {page_num_str}")
-                                    entry_found = False  # Reset for next entry
-                                    entry_rect = None
-                                    break
-                                # Continue building the rect if we're in a multi-line entry
-                                elif entry_found and entry_rect:
-                                    entry_rect = entry_rect | fitz.Rect(line["bbox"])
-                            else:
-                                # Single line entry - use existing logic
-                                if (page_num_str in line_text and 
-                                    not line_text_stripped.split()[0].isdigit() and
-                                    ('.' * 3) in line_text and
-                                    line_text.strip().endswith(page_num_str)):
-                                    
-                                    logging.info(f"Auto mode: Found single-line TOC entry for page {page_num_str}: '{line_text_stripped[:50]}...'")
-                                    
-                                    # Create hyperlink for the entire line
-                                    rect = fitz.Rect(line["bbox"])
-                                    expanded_rect = fitz.Rect(
-                                        MARGIN_MM,
-                                        rect.y0,
-                                        page.rect.width - MARGIN_MM,
-                                        rect.y1
-                                    )
-                                    
-                                    page.insert_link({
-                                        "kind": fitz.LINK_GOTO,
-                                        "from": expanded_rect,
-                                        "page": target_page_idx,
-                                        "zoom": 0
-                                    })
-                                    
-                                    logging.debug(f"Added automatic mode link from TOC page {toc_page_idx+1} to target page {target_page_idx+1}")
-                                    break
+                def auto_skip_line(line_text_stripped, bbox):
+                    # Skip section headers in automatic mode; entry lines rarely start with
+                    # a digit, so that cheap test comes before splitting into words
+                    if line_text_stripped[:1].isdigit():
+                        words = line_text_stripped.split()
+                        if (len(words) >= 2 and words[0].isdigit() and
+                            any(word.lower() in AUTO_SECTION_WORDS for word in words[1:])):
+                            return True
+                    # Skip main title
+                    return (line_text_stripped == "Table of Contents" or
+                            "TABLES, FIGURES AND GRAPHS" in line_text_stripped)
+
+                line_index = {}
+                for page_idx, page_lines in toc_page_lines.items():
+                    line_index[page_idx] = _index_toc_lines(page_lines, auto_skip_line)
+
+                _insert_toc_links(doc, toc_entries, line_index, "automatic")
             else:
                 # Manual mode: sections are "14.1 Something", "14.3 Something"
                 logging.info("Using manual mode hyperlink creation logic")
@@ -689,271 +857,163 @@ def prepend_toc_to_pdf(toc_pdf_path: Path, content_pdf_path: Path, final_output_
                 
                 # Scan through all pages in TOC
                 for page_idx in range(min(num_toc_pages, 3)):  # Check first 3 pages max
-                    page = doc[page_idx]
-                    text_blocks = page.get_text("dict")["blocks"]
-                    for block in text_blocks:
-                        for line in block.get("lines", []):
-                            line_text = "".join(span.get("text", "") for span in line.get("spans", []))
-                            line_text_stripped = line_text.strip()
-                            
-                            # Check for main title
-                            if (line_text_stripped.startswith("14. TABLES") or 
-                                "TABLES, FIGURES AND GRAPHS" in line_text_stripped or
-                                line_text_stripped == "Table of Contents"):
-                                main_title_line = {
-                                    'page': page_idx,
-                                    'rect': fitz.Rect(line["bbox"]),
-                                    'text': line_text_stripped
-                                }
-                                logging.info(f"Identified main title on page {page_idx+1}: '{line_text_stripped}'")
-                                break
-                            
-                            # Check for manual mode section header patterns (14.1, 14.3, etc.)
-                            if (line_text_stripped and
-                                len(line_text_stripped.split()) >= 2 and 
-                                any(line_text_stripped.startswith(f"{i}.{j}") for i in range(10, 20) for j in range(1, 10))):
-                                section_header_lines.append({
-                                    'page': page_idx,
-                                    'rect': fitz.Rect(line["bbox"]),
-                                    'text': line_text_stripped
-                                })
+                    for line_text, line_text_stripped, bbox in toc_page_lines[page_idx]:
+                        # Check for main title
+                        if (line_text_stripped.startswith("14. TABLES") or 
+                            "TABLES, FIGURES AND GRAPHS" in line_text_stripped or
+                            line_text_stripped == "Table of Contents"):
+                            main_title_line = {
+                                'page': page_idx,
+                                'bbox': bbox,
+                                'text': line_text_stripped
+                            }
+                            logging.info(f"Identified main title on page {page_idx+1}: '{line_text_stripped}'")
+                            continue
+                        
+                        # Check for manual mode section header patterns (14.1, 14.3, etc.)
+                        if (line_text_stripped and
+                            len(line_text_stripped.split()) >= 2 and 
+                            _MANUAL_SECTION_HEADER_RE.match(line_text_stripped)):
+                            section_header_lines.append({
+                                'page': page_idx,
+                                'bbox': bbox,
+                                'text': line_text_stripped
+                            })
+                            if info_enabled:
                                 logging.info(f"Identified manual mode section header line on page {page_idx+1}: '{line_text_stripped}'")
                 
-                for entry in toc_entries:
-                    # Skip header entries - they don't get hyperlinks in the TOC
-                    if entry.get('is_header', False):
-                        logging.debug(f"Skipping link creation for header: {entry['text']}")
-                        continue
-                        
-                    # Skip entries with no target page
-                    if entry.get('target_page') is None:
-                        logging.debug(f"Skipping link creation for entry with no target page: {entry['text']}")
-                        continue
-                        
-                    toc_page_idx = entry['toc_page'] - 1  # Convert 1-based to 0-based
-                    target_page_idx = entry['target_page'] - 1  # Convert 1-based to 0-based
-                    
-                    # Get the page
-                    page = doc[toc_page_idx]
-                    
-                    # Enhanced matching for wrapped titles
-                    is_multiline = entry.get('is_multiline', False)
-                    page_num_str = entry['page_num_str']
-                    first_words = entry.get('first_words', '')
-                    
-                    # Find the line(s) with this entry
-                    text_blocks = page.get_text("dict")["blocks"]
-                    entry_found = False
-                    entry_rect = None
-                    
-                    for block in text_blocks:
-                        for line in block.get("lines", []):
-                            line_text = "".join(span.get("text", "") for span in line.get("spans", []))
-                            
-                            # Get the rectangle for this line
-                            rect = fitz.Rect(line["bbox"])
-                            
-                            # Check if this line is the main title - never add hyperlinks to it
-                            if main_title_line and main_title_line['page'] == toc_page_idx and main_title_line['rect'].intersects(rect):
-                                continue
-                            
-                            # Check if this line is a section header
-                            is_section_header = False
-                            for header_line in section_header_lines:
-                                if header_line['page'] == toc_page_idx and header_line['rect'].intersects(rect):
-                                    is_section_header = True
-                                    break
-                            
-                            # Skip section headers
-                            if is_section_header:
-                                continue
-                            
-                            # For multi-line entries, match by first words or page number
-                            if is_multiline:
-                                # Check if this line contains the beginning of our entry
-                                if first_words and first_words in line_text:
-                                    # This is the start of our multi-line entry
-                                    entry_rect = fitz.Rect(line["bbox"])
-                                    entry_found = True
-                                    logging.debug(f"Found start of multi-line entry: '{line_text.strip()[:50]}...'")
-                                # Or check if it's a line with page number at the end
-                                elif page_num_str in line_text and line_text.strip().endswith(page_num_str):
-                                    # This is the end line with page number
-                                    if entry_rect:
-                                        # Expand rect to include this line
-                                        entry_rect = entry_rect | fitz.Rect(line["bbox"])
-                                    else:
-                                        entry_rect = fitz.Rect(line["bbox"])
-                                    
-                                    # Create hyperlink for the entire multi-line entry
-                                    expanded_rect = fitz.Rect(
-                                        MARGIN_MM,
-                                        entry_rect.y0,
-                                        page.rect.width - MARGIN_MM,
-                                        entry_rect.y1
-                                    )
-                                    
-                                    page.insert_link({
-                                        "kind": fitz.LINK_GOTO,
-                                        "from": expanded_rect,
-                                        "page": target_page_idx,
-                                        "zoom": 0
-                                    })
-                                    
-                                    logging.info(f"Added multi-line link for manual mode entry ending with page {page_num_str}")
-                                    entry_found = False  # Reset for next entry
-                                    entry_rect = None
-                                    break
-                                # Continue building the rect if we're in a multi-line entry
-                                elif entry_found and entry_rect:
-                                    entry_rect = entry_rect | fitz.Rect(line["bbox"])
-                            else:
-                                # Single line entry - use existing logic
-                                if page_num_str in line_text and line_text.strip().endswith(page_num_str):
-                                    logging.info(f"Manual mode: Found single-line match for entry with page {page_num_str}: '{line_text.strip()[:50]}...'")
-                                    
-                                    # Create hyperlink for the entire line
-                                    expanded_rect = fitz.Rect(
-                                        MARGIN_MM,
-                                        rect.y0,
-                                        page.rect.width - MARGIN_MM,
-                                        rect.y1
-                                    )
-                                    
-                                    page.insert_link({
-                                        "kind": fitz.LINK_GOTO,
-                                        "from": expanded_rect,
-                                        "page": target_page_idx,
-                                        "zoom": 0
-                                    })
-                                    
-                                    logging.debug(f"Added manual mode link from TOC page {toc_page_idx+1} to target page {target_page_idx+1}")
-                                    break
+                # Section header bboxes by TOC page, so each line is only tested
+                # against the headers on its own page
+                header_bboxes_by_page = {}
+                for header_line in section_header_lines:
+                    header_bboxes_by_page.setdefault(header_line['page'], []).append(header_line['bbox'])
+
+                def manual_skip_line(line_text_stripped, bbox):
+                    # Check if this line is the main title - never add hyperlinks to it
+                    if main_title_line and main_title_line['page'] == page_idx and _y_overlap(main_title_line['bbox'], bbox):
+                        return True
+                    # Check if this line is a section header
+                    return any(_y_overlap(header_bbox, bbox) for header_bbox in header_bboxes_by_page.get(page_idx, ()))
+
+                line_index = {}
+                for page_idx, page_lines in toc_page_lines.items():
+                    line_index[page_idx] = _index_toc_lines(page_lines, manual_skip_line)
+
+                _insert_toc_links(doc, toc_entries, line_index, "manual")
         
         # Generate bookmarks
         final_bookmarks = []
         
         # Add main title as the first bookmark pointing to TOC page 1
-        if main_title_line:
+        if build_bookmarks and main_title_line:
             main_title_text = main_title_line['text']
             # Add as level 1 bookmark (PyMuPDF requires first item to be level 1)
             final_bookmarks.append([1, main_title_text, 1])
             logging.info(f"Added main title as top-level bookmark: '{main_title_text}'")
         
-        if not final_df.empty and page_map is not None:
+        if build_bookmarks and not final_df.empty and page_map is not None:
             # Create a dictionary to keep track of TOC sections and their positions
             # This will help us create hierarchical bookmarks
             section_to_toc_page = {}
             
-            # First, find TOC section header positions
+            # First, find TOC section header positions. Headers look like "14.1 Demographic Data"
+            # (manual mode) or "1 Tables" (automatic mode); a header belongs to a section when its
+            # first token is one of the section numbers present in final_df.
+            known_sections = set()
+            if 'section_number' in final_df.columns:
+                known_sections = {str(sn) for sn in final_df['section_number'].dropna().unique()}
             if toc_entries:
                 for entry in toc_entries:
                     if entry.get('is_header', False):
-                        # Extract section number from header text (expecting format like "14.1 Demographic Data" for manual mode
-                        # or "1 Tables", "2 Figures", "3 Listings" for automatic mode)
-                        text_parts = entry['text'].strip().split()
-                        section_num = None
-                        
-                        # Check for manual mode format (e.g., "14.1", "14.3")
-                        if text_parts and any(part.startswith(('14.1', '14.3')) for part in text_parts):
-                            section_num = text_parts[0]  # Get '14.1' or '14.3' part
-                        # Check for automatic mode format (e.g., "1 Tables", "2 Figures", "3 Listings")
-                        elif (text_parts and len(text_parts) >= 2 and
-                              text_parts[0].isdigit() and
-                              any(word.lower() in ['tables', 'figures', 'listings'] for word in text_parts[1:])):
-                            section_num = text_parts[0]  # Get '1', '2', or '3' part
-                        
-                        if section_num:
+                        text_parts = entry['text'].split(None, 1)
+                        if text_parts and text_parts[0] in known_sections:
+                            section_num = text_parts[0]
                             section_to_toc_page[section_num] = entry['toc_page']
-                            logging.info(f"Found section header {section_num} on TOC page {entry['toc_page']}")
+                            if info_enabled:
+                                logging.info(f"Found section header {section_num} on TOC page {entry['toc_page']}")
             
-            # Group files by section number
-            section_groups = {}
+            # Section titles keyed by section number, plus one flat list of
+            # BookmarkEntry tuples for all sections
+            section_titles = {}
+            all_entries = []
             
-            # First pass - collect entries by section
-            for index, row in final_df.iterrows():
-                try:
-                    section_number = row['section_number']
-                    section_name = row.get('ICH_section_name', '')
-                    
-                    # Clean section name
-                    section_name = clean_text(section_name)
-                    
-                    if section_number not in section_groups:
-                        section_groups[section_number] = {
-                            'title': f"{section_number} {section_name}",
-                            'entries': []
-                        }
-                    
-                    filepath_str = str(row['filepath'])
-                    base_title = str(row['title'])
-                    filename_stem = Path(filepath_str).stem
-                    
-                    # Clean the title text
-                    base_title = clean_text(base_title)
-                    bookmark_title = f"{base_title} ({filename_stem})"
-                    
-                    original_page_num = page_map.get(filepath_str)
-                    if original_page_num is not None:
-                        # Adjust page number by adding the number of TOC pages (1-based)
-                        final_page_num = original_page_num + num_toc_pages
-                        
-                        # Add to the appropriate section group
-                        section_groups[section_number]['entries'].append({
-                            'title': bookmark_title,
-                            'page': final_page_num,
-                            'filename_stem': filename_stem  # Store for sorting
-                        })
-                except KeyError as e:
-                    logging.warning(f"Skipping bookmark due to missing column in final_df: {e}")
+            # First pass - collect entries by section, working on whole columns
+            missing_cols = {'section_number', 'filepath', 'title'} - set(final_df.columns)
+            if missing_cols:
+                logging.warning(f"Skipping document bookmarks due to missing columns in final_df: {missing_cols}")
+            else:
+                section_numbers = final_df['section_number']
+                if 'ICH_section_name' in final_df.columns:
+                    section_names = final_df['ICH_section_name'].fillna('')
+                else:
+                    section_names = pd.Series('', index=final_df.index)
+
+                # Section header titles, from the first row of each section
+                first_in_section = ~section_numbers.duplicated()
+                for section_number, section_name in zip(section_numbers[first_in_section], section_names[first_in_section]):
+                    section_titles[section_number] = f"{section_number} {clean_text(str(section_name))}"
+
+                # Rows whose PDF made it into the combined document
+                filepaths = final_df['filepath'].map(str)
+                original_pages = filepaths.map(page_map)
+                found = original_pages.notna()
+
+                # Stems and cleaned titles are derived once per column rather than per row
+                if 'filename_stem' in final_df.columns:
+                    stems = final_df['filename_stem'][found].map(str)
+                else:
+                    stems = filepaths[found].map(lambda p: Path(p).stem)
+                cleaned_titles = final_df['title'][found].map(str).map(clean_text)
+                bookmark_titles = cleaned_titles + ' (' + stems + ')'
+
+                # Section and stem first so a single sort orders entries like the TOC.
+                # The TOC page offset is applied to all pages at once after sorting.
+                all_entries.extend(map(BookmarkEntry._make, zip(
+                    section_numbers[found], stems, bookmark_titles,
+                    original_pages[found].astype(int).tolist())))
             
             # Second pass - build hierarchical bookmarks
-            # Sort the section numbers to match TOC order
-            sorted_section_numbers = sorted(section_groups.keys())
+            section_entries = _build_section_bookmarks(all_entries, num_toc_pages)
+            sorted_section_numbers = sorted(section_titles, key=section_sort_key)
+            append_bm = final_bookmarks.append
+            extend_bm = final_bookmarks.extend
+            get_toc_page = section_to_toc_page.get
+            get_entries = section_entries.get
             
             for section_number in sorted_section_numbers:
-                group = section_groups[section_number]
-                
-                # Sort entries by filename to match TOC order
-                group['entries'].sort(key=lambda x: x['filename_stem'])
+                # Find the TOC page for this section, defaulting to the first TOC page
+                section_key = str(section_number)
+                toc_page = get_toc_page(section_key)
+                if toc_page is None:
+                    toc_page = 1
+                elif info_enabled:
+                    logging.info("Section %s bookmark will point to TOC page %s", section_key, toc_page)
                 
-                # Find the TOC page for this section (if available)
-                toc_page = 1  # Default to first page of TOC
-                # Convert section_number to the format used in section_to_toc_page
-                section_key = section_number
-                
-                # For automatic mode, section_number will be "1", "2", "3" etc.
-                # For manual mode, section_number will be "14.1", "14.3" etc.
-                # No conversion needed - use section_number directly
-                
-                # Get TOC page for this section or use main TOC page
-                if section_key in section_to_toc_page:
-                    toc_page = section_to_toc_page[section_key]
-                    logging.info(f"Section {section_key} bookmark will point to TOC page {toc_page}")
-                
-                # Add section header bookmark pointing to TOC
-                section_bookmark = [2, group['title'], toc_page]  # Level 2 (under main title)
-                final_bookmarks.append(section_bookmark)
-                
-                # Add document bookmarks under this section
-                for entry in group['entries']:
-                    document_bookmark = [3, entry['title'], entry['page']]  # Level 3 (under section)
-                    final_bookmarks.append(document_bookmark)
+                # Add section header bookmark pointing to TOC (level 2, under main title)
+                append_bm([2, section_titles[section_number], toc_page])
+
+                # Add document bookmarks under this section (level 3, under section)
+                extend_bm(get_entries(section_number, ()))
             
-            if final_bookmarks:
+            if len(final_bookmarks) > LARGE_TOC_BOOKMARKS:
+                logging.warning(f"Large outline ({len(final_bookmarks)} bookmarks); setting it with collapse=2, this may take a while")
+                doc.set_toc(final_bookmarks, collapse=2)
+            elif final_bookmarks:
                 doc.set_toc(final_bookmarks)
                 logging.info(f"Generated {len(final_bookmarks)} hierarchical bookmarks")
         
         # Save the final PDF
+        if deflate_images is None:
+            deflate_images = deflate
+        logging.info(f"Saving final PDF with garbage={garbage}, deflate={deflate}, "
+                     f"deflate_images={deflate_images}, compression_effort={compression_effort}")
         final_output_path.parent.mkdir(parents=True, exist_ok=True)
-        doc.save(str(final_output_path), garbage=4, deflate=True)
+        # Document.save only accepts compression_effort from PyMuPDF 1.24 on
+        save_kwargs = {'compression_effort': compression_effort} if compression_effort else {}
+        doc.save(str(final_output_path), garbage=garbage, deflate=deflate,
+                 deflate_images=deflate_images, deflate_fonts=deflate, **save_kwargs)
         doc.close()
         
-        # Clean up temp file
-        if temp_merged_path.exists():
-            temp_merged_path.unlink()
-            logging.debug(f"Removed temporary file {temp_merged_path}")
-        
         logging.info(f"Successfully created final PDF: {final_output_path}")
         return final_output_path
     
@@ -961,62 +1021,20 @@ def prepend_toc_to_pdf(toc_pdf_path: Path, content_pdf_path: Path, final_output_
         logging.error(f"Error in prepend_toc_to_pdf: {e}", exc_info=True)
         return None
 
+@lru_cache(maxsize=4096)
 def clean_text(text):
     """Clean text by removing non-printable characters and normalizing whitespace.
     
+    Results are memoized, since the same section names and titles are cleaned
+    repeatedly; callers must pass a (hashable) str.
+    
     Args:
         text: The text to clean
         
     Returns:
         Cleaned text string
     """
-    import re
-    # Replace non-ASCII characters and control characters
-    text = re.sub(r'[\x00-\x1F\x7F-\xFF\u200B-\u200F\u2028-\u202F\u2060-\u206F]', ' ', text)
-    # Replace special Unicode characters often found in RTF
-    text = text.replace('\u00a0', ' ')  # Non-breaking space
-    # Clean up multiple spaces
-    text = re.sub(r'\s+', ' ', text)
-    # Replace € and similar markers
-    text = re.sub(r'[€~]', ' ', text)
-    return text.strip()
-
-# def combine_pdfs(input_folder: Path, output_path: Path) -> Path | None:
-#     """Combines all PDF files in a given folder into a single PDF.
-
-#     Args:
-#         input_folder: Path to the folder containing the individual PDF files.
-#         output_path: The path where the combined PDF will be saved.
-
-#     Returns:
-#         The path to the combined PDF if successful, None otherwise.
-#     """
-#     logging.info(f"--- Combining PDFs from {input_folder.name} into {output_path.name} ---")
-#     pdf_files = sorted(input_folder.glob("*.pdf")) # Sort to maintain order if needed
-
-#     if not pdf_files:
-#         logging.warning(f"No PDF files found in {input_folder}, skipping combination.")
-#         return None
-
-#     merger = PdfWriter()
-
-#     try:
-#         for pdf_file in pdf_files:
-#             try:
-#                 merger.append(str(pdf_file))
-#                 logging.debug(f"Appended {pdf_file.name} to the merger.")
-#             except Exception as append_err:
-#                 logging.error(f"Failed to append {pdf_file.name}: {append_err}")
-#                 # Optionally decide whether to continue or abort on individual file failure
-#                 # return None # Abort if any file fails
-
-#         output_path.parent.mkdir(parents=True, exist_ok=True) # Ensure output dir exists
-#         merger.write(str(output_path))
-#         merger.close()
-#         logging.info(f"Successfully combined {len(pdf_files)} PDFs into {output_path}")
-#         return output_path
-
-#     except Exception as merge_err:
-#         logging.error(f"Failed to combine PDFs: {merge_err}", exc_info=True)
-#         merger.close() # Ensure the writer is closed even on error
-#         return None 
\ No newline at end of file
+    # Replace non-ASCII, control and special Unicode characters and the € / ~ markers
+    text = text.translate(_CLEAN_TEXT_TABLE)
+    # Clean up multiple spaces (str.split() splits on the same characters as \s)
+    return ' '.join(text.split())
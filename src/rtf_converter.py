@@ -1,21 +1,28 @@
 import sys
+import os
+import math
 import logging
 import gc
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from pathlib import Path
 
 # Optional imports
 try:
-    import fitz  # PyMuPDF for bookmarks
+    import fitz  # PyMuPDF, to check PDFs left by a failed worker
 except ImportError:
     fitz = None
 
 # Only import com client if on Windows
 if sys.platform == 'win32':
     try:
+        import pythoncom
         import win32com.client
     except ImportError:
+        pythoncom = None
         win32com = None
 else:
+    pythoncom = None
     win32com = None
 
 # Configure logging
@@ -25,99 +32,244 @@ logging.basicConfig(
 )
 
 WD_FORMAT_PDF = 17  # Word constant
+MAX_WORD_INSTANCES = 4  # Default cap on concurrent Word instances in convert_rtf_batch
+CHUNKS_PER_WORKER = 4  # Batches per worker; more chunks give finer progress, fewer reuse Word longer
+GC_EVERY_N_CONVERSIONS = 25  # Full garbage collection interval within a batch
 
 
-def _add_bookmark(pdf_path: Path, title: str) -> bool:
-    """Open the PDF at pdf_path, add a top‐level bookmark, and overwrite it."""
-    if not fitz:
-        logging.warning("PyMuPDF not installed; skipping bookmark.")
+def _check_conversion_support() -> bool:
+    """Log why RTF→PDF conversion is unavailable, if it is; return True if it's supported."""
+    if sys.platform != 'win32':
+        logging.error("RTF→PDF conversion only supported on Windows.")
         return False
 
-    tmp_path = pdf_path.with_suffix(pdf_path.suffix + ".tmp")
-    try:
-        with fitz.open(pdf_path) as src, fitz.open() as dst:
-            dst.insert_pdf(src)
-            dst.set_toc([(1, title, 1)])
-            dst.save(tmp_path, garbage=4, deflate=True)
-
-        tmp_path.replace(pdf_path)
-        logging.info(f"Bookmarked PDF saved: {pdf_path.name}")
-        return True
-
-    except Exception as err:
-        logging.error(f"Failed to add bookmark: {err}")
-        tmp_path.unlink(missing_ok=True)
+    if not win32com:
+        logging.error("pywin32 is required for COM automation.")
         return False
 
+    return True
 
-def convert_rtf_to_pdf(rtf_path: str, pdf_path: str, title: str = None) -> bool:
-    """
-    Convert an RTF to PDF via Word COM; optionally add a bookmark.
-    Returns True if conversion succeeded (bookmark failures don't fail conversion).
+
+class RtfBatchConverter:
     """
-    rtf = Path(rtf_path)
-    pdf = Path(pdf_path)
+    Convert RTFs to PDF through a single Word COM instance.
 
-    if sys.platform != 'win32':
-        logging.error("RTF→PDF conversion only supported on Windows.")
-        return False
+    Use as a context manager: Word is started on the first conversion and quit on
+    exit, so a batch of files pays Word's startup cost once instead of per file.
+    If a conversion fails, Word is restarted for the next one in case the
+    instance itself is what broke.
 
-    if not win32com:
-        logging.error("pywin32 is required for COM automation.")
-        return False
+    Released COM objects are reclaimed by a full garbage collection every
+    GC_EVERY_N_CONVERSIONS successful conversions and whenever Word is quit,
+    rather than after every file.
+    """
 
-    # Ensure output directory exists
-    pdf.parent.mkdir(parents=True, exist_ok=True)
+    def __init__(self):
+        self.word = None
+        self._conversions_since_gc = 0
 
-    word = None
-    doc = None
+    def __enter__(self) -> "RtfBatchConverter":
+        return self
 
-    try:
-        logging.info(f"Converting {rtf.name} → {pdf.name}")
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.close()
+
+    def _start_word(self):
+        logging.debug("Starting Word")
         word = win32com.client.DispatchEx("Word.Application")
         word.Visible = False
         word.DisplayAlerts = False
+        return word
 
-        # Ensure absolute paths are passed to Word
-        rtf_abs = str(rtf.resolve())
-        pdf_abs = str(pdf.resolve())
+    def close(self) -> None:
+        """Quit Word, if it was started, and release the COM object."""
+        if self.word is None:
+            return
+        try:
+            logging.debug("Attempting to quit Word")
+            self.word.Quit()
+            logging.debug("Word Quit command issued")
+        except Exception as word_quit_err:
+            logging.warning(f"Error quitting Word: {word_quit_err}")
+        finally:
+            # Release COM objects and collect garbage
+            self.word = None
+            gc.collect()
+            self._conversions_since_gc = 0
 
-        doc = word.Documents.Open(rtf_abs, ReadOnly=True)
-        doc.SaveAs(pdf_abs, FileFormat=WD_FORMAT_PDF)
-        logging.info("PDF conversion succeeded.")
+    def convert(self, rtf_path: str, pdf_path: str) -> bool:
+        """
+        Convert one RTF to PDF with this converter's Word instance.
+        Returns True if conversion succeeded.
+        """
+        rtf = Path(rtf_path)
+        pdf = Path(pdf_path)
 
-        return True
+        if not _check_conversion_support():
+            return False
 
-    except Exception as e:
-        logging.error(f"Conversion error: {e}")
-        return False
+        # Ensure output directory exists
+        pdf.parent.mkdir(parents=True, exist_ok=True)
+
+        doc = None
+        succeeded = False
 
-    finally:
-        # Cleanly close Word objects
-        closed_doc = False
-        quit_word = False
         try:
-            if doc:
-                logging.debug(f"Attempting to close document for {rtf.name}")
-                doc.Close(False)
-                closed_doc = True
-                logging.debug(f"Document closed for {rtf.name}")
-        except Exception as doc_close_err:
-            logging.warning(f"Error closing document for {rtf.name}: {doc_close_err}")
+            logging.info(f"Converting {rtf.name} → {pdf.name}")
+            if self.word is None:
+                self.word = self._start_word()
+
+            # Ensure absolute paths are passed to Word
+            rtf_abs = str(rtf.resolve())
+            pdf_abs = str(pdf.resolve())
+
+            doc = self.word.Documents.Open(rtf_abs, ReadOnly=True)
+            doc.SaveAs(pdf_abs, FileFormat=WD_FORMAT_PDF)
+            logging.info("PDF conversion succeeded.")
+
+            succeeded = True
+            return True
+
+        except Exception as e:
+            logging.error(f"Conversion error: {e}")
+            return False
+
         finally:
-            # Always try to quit Word, even if doc close failed
+            # Cleanly close the document; Word stays open for the next file
             try:
-                if word:
-                    logging.debug(f"Attempting to quit Word for {rtf.name}")
-                    word.Quit()
-                    quit_word = True
-                    logging.debug(f"Word Quit command issued for {rtf.name}")
-            except Exception as word_quit_err:
-                logging.warning(f"Error quitting Word for {rtf.name}: {word_quit_err}")
+                if doc:
+                    logging.debug(f"Attempting to close document for {rtf.name}")
+                    doc.Close(False)
+                    logging.debug(f"Document closed for {rtf.name}")
+            except Exception as doc_close_err:
+                logging.warning(f"Error closing document for {rtf.name}: {doc_close_err}")
             finally:
-                # Release COM objects and collect garbage
                 doc = None
-                word = None
-                logging.debug(f"Running garbage collection after {rtf.name}")
-                gc.collect()
-                logging.debug(f"Garbage collection finished after {rtf.name}")
+                if not succeeded:
+                    # Start from a fresh Word instance after a failure
+                    self.close()
+                else:
+                    self._conversions_since_gc += 1
+                    if self._conversions_since_gc >= GC_EVERY_N_CONVERSIONS:
+                        logging.debug(f"Running garbage collection after {rtf.name}")
+                        gc.collect()
+                        self._conversions_since_gc = 0
+
+
+def convert_rtf_to_pdf(rtf_path: str, pdf_path: str, title: str = None) -> bool:
+    """
+    Convert an RTF to PDF via Word COM; optionally add a bookmark.
+    Returns True if conversion succeeded (bookmark failures don't fail conversion).
+
+    Starts and quits its own Word instance; use RtfBatchConverter to convert
+    several files with one instance.
+    """
+    with RtfBatchConverter() as converter:
+        return converter.convert(rtf_path, pdf_path)
+
+
+def _convert_chunk(pairs: list[tuple[str, str]]) -> list[bool]:
+    """Worker for convert_rtf_batch: convert (rtf, pdf) pairs with one Word instance."""
+    pythoncom.CoInitialize()
+    try:
+        with RtfBatchConverter() as converter:
+            return [converter.convert(rtf_path, pdf_path) for rtf_path, pdf_path in pairs]
+    finally:
+        gc.collect()
+        pythoncom.CoUninitialize()
+
+
+def _remove_stale_pdf(pdf_path: str) -> None:
+    """Delete a PDF left at pdf_path by an earlier run, so it can't pass as this run's output."""
+    try:
+        os.remove(pdf_path)
+    except FileNotFoundError:
+        pass
+    except OSError as e:
+        logging.warning(f"Could not remove old PDF {pdf_path}: {e}")
+
+
+def _pdf_written(pdf_path: str, since: float) -> bool:
+    """Whether a complete PDF was written at pdf_path at or after the time since."""
+    try:
+        if os.path.getmtime(pdf_path) < since:
+            return False
+    except OSError:
+        return False
+    if fitz is None:
+        return True
+    # A PDF Word died while writing fails to open or has no pages
+    try:
+        with fitz.open(pdf_path) as doc:
+            return doc.page_count > 0
+    except Exception:
+        return False
+
+
+def convert_rtf_batch(pairs: list[tuple[str, str]], max_workers: int | None = 1,
+                      progress_callback=None) -> list[bool]:
+    """
+    Convert (rtf_path, pdf_path) pairs to PDF, running several Word instances in parallel.
+
+    Pairs are split into chunks, each converted by a worker process with its own
+    Word instance (invisible Word instances can run side by side). With
+    max_workers=1 (the default) everything runs in this process with a single
+    Word instance. Target PDFs are deleted before parallel conversion starts;
+    if a worker fails, the files of its chunk whose PDF was written in this run
+    and opens as a PDF still count as converted.
+
+    Args:
+        pairs: (rtf_path, pdf_path) pairs to convert
+        max_workers: Number of worker processes (default 1); None uses the CPU
+                     count, capped at MAX_WORD_INSTANCES
+        progress_callback: Optional callback called with (converted_files, total_files)
+
+    Returns:
+        One success flag per pair, in input order
+    """
+    pairs = list(pairs)
+    total = len(pairs)
+    if not pairs:
+        return []
+    if not _check_conversion_support():
+        return [False] * total
+
+    if max_workers is None:
+        max_workers = min(os.cpu_count() or 1, MAX_WORD_INSTANCES)
+    max_workers = max(1, min(max_workers, total))
+
+    if max_workers == 1:
+        results = []
+        with RtfBatchConverter() as converter:
+            for rtf_path, pdf_path in pairs:
+                results.append(converter.convert(rtf_path, pdf_path))
+                if progress_callback:
+                    progress_callback(len(results), total)
+        return results
+
+    chunk_size = math.ceil(total / (max_workers * CHUNKS_PER_WORKER))
+    chunk_starts = range(0, total, chunk_size)
+    results = [False] * total
+    done = 0
+    logging.info(f"Converting {total} files with {max_workers} Word instances")
+    started = time.time()
+    for _rtf_path, pdf_path in pairs:
+        _remove_stale_pdf(pdf_path)
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        futures = {executor.submit(_convert_chunk, pairs[start:start + chunk_size]): start
+                   for start in chunk_starts}
+        for future in as_completed(futures):
+            start = futures[future]
+            chunk_len = min(chunk_size, total - start)
+            try:
+                results[start:start + chunk_len] = future.result()
+            except Exception as e:
+                # Files converted before the failure have their PDF on disk
+                chunk_results = [_pdf_written(pdf_path, started) for _rtf_path, pdf_path in pairs[start:start + chunk_len]]
+                results[start:start + chunk_len] = chunk_results
+                logging.error(f"Conversion worker failed ({e}); {chunk_results.count(False)} of its "
+                              f"{chunk_len} files were not converted")
+            done += chunk_len
+            if progress_callback:
+                progress_callback(done, total)
+    return results
@@ -1,67 +1,330 @@
 import logging
+import math
 import os
+import sqlite3
+import sys
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
 from pathlib import Path
 import pandas as pd
 from striprtf.striprtf import rtf_to_text
 
-# Configure logging (consistent with other modules)
-logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+# Logging is configured by the application entry point, not on import (this module is
+# also imported by every title-extraction worker process)
+logger = logging.getLogger(__name__)
 
-def _extract_title_from_single_rtf(rtf_path: Path, max_bytes: int = 10000) -> str | None:
-    """Internal helper to extract title from a single RTF file."""
-    base_name = rtf_path.name # For logging
+# Below this many files, title extraction runs serially; the thread pool's startup costs more
+PARALLEL_MIN_FILES = 8
+# Below this many files, titles are parsed in this process. Spawning a worker (as on Windows)
+# re-imports pandas and this module, ~0.5-1 s, while parsing a title takes ~0.4 ms
+PROCESS_POOL_MIN_FILES = 2000
+# Concurrent file reads; reads release the GIL, so these overlap with parsing
+IO_THREADS = 32
+# Most files parsed per process-pool task; batching amortizes the per-task pickling and IPC
+PARSE_BATCH_MAX = 32
+# First prefix parsed when looking for a title, doubled until a complete line is found;
+# SAS RTF output puts the title row within the first 2 KB, after the font/color tables and footer
+TITLE_SCAN_START_BYTES = 2048
+# Files smaller than this can't hold more than the bare "{\rtf1}" header, so they aren't opened
+MIN_RTF_BYTES = 8
+# Flags for reading file heads through a raw descriptor (O_BINARY only exists, and matters, on Windows)
+_READ_FLAGS = os.O_RDONLY | getattr(os, 'O_BINARY', 0)
+# Persistent title cache, in the per-user cache folder (%LOCALAPPDATA% on Windows);
+# bump the version when title extraction changes so old entries are ignored
+if sys.platform == 'win32':
+    _CACHE_HOME = Path(os.environ.get('LOCALAPPDATA') or Path.home() / 'AppData' / 'Local')
+else:
+    _CACHE_HOME = Path(os.environ.get('XDG_CACHE_HOME') or Path.home() / '.cache')
+TITLE_CACHE_PATH = _CACHE_HOME / 'rtf2pdf' / 'titles.sqlite3'
+TITLE_CACHE_VERSION = 1
+# Paths per cache lookup query; keeps under older SQLite's 999-parameter limit
+_LOOKUP_BATCH = 500
+# Arrow-backed title column when pyarrow is installed, with NaN for missing titles like
+# pandas' default str dtype; None leaves the dtype to pandas
+try:
+    TITLE_DTYPE = pd.StringDtype('pyarrow', na_value=float('nan'))
+except (ImportError, TypeError): # pyarrow missing, or pandas too old for na_value
+    TITLE_DTYPE = None
+# Titles looked up or extracted with the cache enabled are also kept for the rest of the
+# process (e.g. repeat GUI runs), keyed like the on-disk cache; oldest entries go first
+TITLE_MEMO_MAX = 50000
+_title_memo: dict[tuple[str, int, int, int], str | None] = {}
+
+
+class _TitleCache:
+    """SQLite cache of extracted titles, keyed by file path, size, mtime and read limit."""
+
+    def __init__(self, path: Path | None = None):
+        path = path or TITLE_CACHE_PATH
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(path)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS titles ("
+            "path TEXT PRIMARY KEY, size INTEGER, mtime_ns INTEGER, max_bytes INTEGER, version INTEGER, title TEXT)"
+        )
+
+    def lookup(self, keys: list[tuple[str, int, int]], max_bytes: int) -> dict[str, str | None]:
+        """Returns {path: title} for the (path, size, mtime_ns) keys whose cached entry is still valid."""
+        wanted = {path: (size, mtime_ns) for path, size, mtime_ns in keys}
+        paths = list(wanted)
+        hits = {}
+        for start in range(0, len(paths), _LOOKUP_BATCH):
+            batch = paths[start:start + _LOOKUP_BATCH]
+            rows = self.conn.execute(
+                "SELECT path, size, mtime_ns, title FROM titles WHERE max_bytes = ? AND version = ? "
+                f"AND path IN ({', '.join('?' * len(batch))})",
+                (max_bytes, TITLE_CACHE_VERSION, *batch)
+            )
+            for path, size, mtime_ns, title in rows:
+                if wanted[path] == (size, mtime_ns):
+                    hits[path] = title
+        return hits
+
+    def store(self, entries: list[tuple[str, int, int, str | None]], max_bytes: int) -> None:
+        """Saves (path, size, mtime_ns, title) entries in one transaction."""
+        with self.conn:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO titles (path, size, mtime_ns, max_bytes, version, title) VALUES (?, ?, ?, ?, ?, ?)",
+                [(path, size, mtime_ns, max_bytes, TITLE_CACHE_VERSION, title) for path, size, mtime_ns, title in entries]
+            )
+
+    def close(self) -> None:
+        self.conn.close()
+
+
+def _memo_titles(entries: list[tuple[str, int, int, str | None]], max_bytes: int) -> None:
+    """Adds (path, size, mtime_ns, title) entries to the in-process memo, keeping at most TITLE_MEMO_MAX."""
+    for path, size, mtime_ns, title in entries:
+        key = (path, size, mtime_ns, max_bytes)
+        _title_memo.pop(key, None) # Re-inserting moves the entry to the newest end
+        _title_memo[key] = title
+    while len(_title_memo) > TITLE_MEMO_MAX:
+        del _title_memo[next(iter(_title_memo))]
+
+
+def _read_rtf_head(rtf_path: Path, max_bytes: int = 10000, known_size: int | None = None) -> bytes | None:
+    """Reads the first max_bytes of an RTF file, or returns None if it can't be read.
+
+    known_size, when given (e.g. from a directory scan), skips files too small to
+    hold a title without opening them and caps the read at the file size.
+    """
+    if known_size is not None:
+        if known_size < MIN_RTF_BYTES:
+            logger.warning("File is too small (%s bytes) to contain a title: %s", known_size, rtf_path.name)
+            return None
+        max_bytes = min(max_bytes, known_size)
+    try:
+        # A raw descriptor: a single bounded read needs no file object or read buffer
+        fd = os.open(rtf_path, _READ_FLAGS)
+        try:
+            return os.read(fd, max_bytes)
+        finally:
+            os.close(fd)
+    except FileNotFoundError:
+        # This shouldn't happen if called from build_title_dataframe which finds the file first
+        logger.error("RTF file not found during title extraction: %s", rtf_path)
+        return None
+    except Exception as e:
+        logger.error("Error processing %s for title: %s", rtf_path.name, e)
+        return None
+
+
+def _first_line(text: str, complete_only: bool = False) -> str | None:
+    """Returns the first non-empty stripped line of text without splitting all of it.
+
+    With complete_only, a trailing line that has no newline after it is ignored.
+    """
+    start = 0
+    while True:
+        nl = text.find('\n', start)
+        if nl == -1 and complete_only:
+            return None
+        line = text[start:nl if nl != -1 else None].strip()
+        if line:
+            return line
+        if nl == -1:
+            return None
+        start = nl + 1
+
+
+def _scan_first_line(rtf_binary: bytes) -> str | None:
+    """Finds the first non-empty text line by parsing growing prefixes of rtf_binary.
+
+    striprtf's output only grows at its end, so once a prefix's text holds a
+    complete non-empty line (one followed by a newline) the rest of the content
+    can't change it. Prefixes end at a raw newline, which never falls inside an
+    RTF control word, and only the prefix being parsed is decoded.
+    Returns None if no prefix settles it.
+    """
+    limit = TITLE_SCAN_START_BYTES
+    while limit < len(rtf_binary):
+        cut = rtf_binary.rfind(b'\n', 0, limit)
+        if cut > 0:
+            # latin-1 (ISO-8859-1) can handle any byte value
+            rtf_content = rtf_binary[:cut].decode('latin-1', errors='ignore')
+            line = _first_line(rtf_to_text(rtf_content), complete_only=True)
+            if line:
+                return line
+        limit *= 2
+    return None
+
+
+def _parse_title_from_bytes(rtf_binary: bytes, base_name: str, max_bytes: int = 10000) -> str | None:
+    """Extracts the title (first non-empty text line) from the start of an RTF file.
+
+    Args:
+        rtf_binary: The first max_bytes of the file.
+        base_name: File name, for logging.
+        max_bytes: The read limit, for logging.
+    """
     try:
-        # First try opening with binary mode to check RTF header
-        with open(rtf_path, 'rb') as file:
-            # Read just enough for the header check
-            header = file.read(6) # b'{\\\\rtf' is 6 bytes
-
-            # Check if we have the RTF header
-            if not header.startswith(b'{\\rtf'):
-                logging.warning(f"File does not appear to start with RTF header: {base_name}")
-                # Proceed anyway, but log warning
-
-            # Reset file position and read limited content
-            file.seek(0)
-            rtf_binary = file.read(max_bytes)
-
-        # Convert binary content to string using a forgiving encoding
-        # latin-1 (ISO-8859-1) can handle any byte value
-        rtf_content = rtf_binary.decode('latin-1', errors='ignore')
-
-        # Convert RTF to plain text using striprtf
-        plain_text = rtf_to_text(rtf_content)
-
-        if not plain_text:
-             logging.warning(f"No text content extracted (within first {max_bytes} bytes) from {base_name}")
-             return None
-
-        # Get the first non-empty line as title
-        lines = plain_text.split('\n')
-        title = next((line.strip() for line in lines if line.strip()), None) # Return None if no title
+        # Check if we have the RTF header
+        if not rtf_binary.startswith(b'{\\rtf'):
+            logger.warning("File does not appear to start with RTF header: %s", base_name)
+            # Proceed anyway, but log warning
+
+        # Titles usually sit in the first few KB, so try short prefixes first
+        title = _scan_first_line(rtf_binary)
+        if title is None:
+            # Convert binary content to string using a forgiving encoding
+            # latin-1 (ISO-8859-1) can handle any byte value
+            rtf_content = rtf_binary.decode('latin-1', errors='ignore')
+
+            # Convert RTF to plain text using striprtf
+            plain_text = rtf_to_text(rtf_content)
+
+            if not plain_text:
+                 logger.warning("No text content extracted (within first %s bytes) from %s", max_bytes, base_name)
+                 return None
+
+            # Get the first non-empty line as title
+            title = _first_line(plain_text) # Return None if no title
         if title:
             # remove trailing | from title if present
             title = title.rstrip('|').strip()
             if title: # Check if title is not empty after stripping
-                logging.debug(f"Extracted title '{title}' from {base_name}")
+                logger.debug("Extracted title '%s' from %s", title, base_name)
                 return title
             else:
-                 logging.warning(f"Extracted title was empty or only '|' for {base_name}")
+                 logger.warning("Extracted title was empty or only '|' for %s", base_name)
                  return None # Treat empty title as no title found
         else:
-            logging.warning(f"No non-empty lines found (within first {max_bytes} bytes) to use as title in {base_name}")
+            logger.warning("No non-empty lines found (within first %s bytes) to use as title in %s", max_bytes, base_name)
             return None
 
-    except FileNotFoundError:
-        # This shouldn't happen if called from build_title_dataframe which finds the file first
-        logging.error(f"RTF file not found during title extraction: {rtf_path}")
-        return None
     except Exception as e:
-        logging.error(f"Error processing {base_name} for title: {e}")
+        logger.error("Error processing %s for title: %s", base_name, e)
+        return None
+
+
+def _extract_title_from_single_rtf(rtf_path: Path, max_bytes: int = 10000, known_size: int | None = None) -> str | None:
+    """Internal helper to extract title from a single RTF file."""
+    rtf_binary = _read_rtf_head(rtf_path, max_bytes, known_size)
+    if rtf_binary is None:
+        return None
+    return _parse_title_from_bytes(rtf_binary, rtf_path.name, max_bytes)
+
+
+class _RecordCollector(logging.Handler):
+    """Keeps the log records of a worker process so the parent process can emit them."""
+
+    def __init__(self):
+        super().__init__()
+        self.records = []
+
+    def emit(self, record: logging.LogRecord) -> None:
+        # Format now so the record pickles regardless of its arguments
+        record.msg = record.getMessage()
+        record.args = None
+        record.exc_info = None
+        self.records.append(record)
+
+
+def _parse_titles_batch(batch: list[tuple[int, bytes, str]], max_bytes: int,
+                        log_level: int) -> tuple[list[tuple[int, str | None]], list[logging.LogRecord]]:
+    """Parses a batch of (index, head, base_name) file heads in a worker process.
+
+    Returns (index, title) pairs and the log records emitted at log_level or above,
+    which the parent passes to its own handlers (the worker has none).
+    """
+    collector = _RecordCollector()
+    logger.setLevel(log_level)
+    logger.addHandler(collector)
+    logger.propagate = False # Handlers inherited through fork would duplicate the parent's output
+    try:
+        titles = [(i, _parse_title_from_bytes(rtf_binary, base_name, max_bytes)) for i, rtf_binary, base_name in batch]
+    finally:
+        logger.removeHandler(collector)
+        logger.propagate = True
+    return titles, collector.records
+
+
+def _extract_titles(rtf_files: list[Path], max_bytes: int, sizes: list[int | None]) -> list[str | None]:
+    """Extracts the titles of rtf_files, in order.
+
+    Files are read by a thread pool and parsed as their reads complete, in
+    batches on a process pool for large folders on multi-core machines, so reads
+    overlap with parsing. sizes holds each file's size, or None if unknown.
+    """
+    if len(rtf_files) < PARALLEL_MIN_FILES:
+        return [_extract_title_from_single_rtf(rtf_path, max_bytes, size) for rtf_path, size in zip(rtf_files, sizes)]
+
+    workers = os.cpu_count() or 1
+    heads = [None] * len(rtf_files)
+    titles = [None] * len(rtf_files)
+    with ThreadPoolExecutor(max_workers=min(IO_THREADS, len(rtf_files))) as io_pool:
+        reads = {io_pool.submit(_read_rtf_head, rtf_path, max_bytes, size): i
+                 for i, (rtf_path, size) in enumerate(zip(rtf_files, sizes))}
+
+        if workers > 1 and len(rtf_files) >= PROCESS_POOL_MIN_FILES:
+            try:
+                # Small enough batches that every worker still gets several, and no
+                # more workers than batches
+                batch_size = max(1, min(PARSE_BATCH_MAX, len(rtf_files) // (workers * 4)))
+                workers = min(workers, math.ceil(len(rtf_files) / batch_size))
+                log_level = logger.getEffectiveLevel()
+                with ProcessPoolExecutor(max_workers=workers) as cpu_pool:
+                    parses = []
+                    batch = []
+                    for read in as_completed(reads):
+                        i = reads[read]
+                        heads[i] = read.result()
+                        if heads[i] is not None:
+                            batch.append((i, heads[i], rtf_files[i].name))
+                            if len(batch) == batch_size:
+                                parses.append(cpu_pool.submit(_parse_titles_batch, batch, max_bytes, log_level))
+                                batch = []
+                    if batch:
+                        parses.append(cpu_pool.submit(_parse_titles_batch, batch, max_bytes, log_level))
+                    for parse in parses:
+                        batch_titles, records = parse.result()
+                        for i, title in batch_titles:
+                            titles[i] = title
+                        for record in records:
+                            logger.handle(record)
+                return titles
+            except Exception as e:
+                # e.g. process creation not permitted; parse in this process instead
+                logger.warning("Parallel title extraction failed (%s); extracting titles serially", e)
+
+        for read in as_completed(reads):
+            i = reads[read]
+            heads[i] = read.result()
+            if heads[i] is not None:
+                titles[i] = _parse_title_from_bytes(heads[i], rtf_files[i].name, max_bytes)
+    return titles
+
+
+def _entry_size(entry: os.DirEntry) -> int | None:
+    """Returns the size of a scandir entry's file, or None if it can't be stat'ed."""
+    try:
+        return entry.stat().st_size
+    except OSError:
         return None
 
 
-def build_title_dataframe(input_dir: Path, max_bytes: int = 10000) -> pd.DataFrame:
+def build_title_dataframe(input_dir: Path, max_bytes: int = 10000, resolve_symlinks: bool = False,
+                          use_cache: bool = False, force: bool = False) -> pd.DataFrame:
     """
     Scans an input directory for RTF files, extracts the title from each,
     and returns a pandas DataFrame mapping absolute file paths to titles.
@@ -69,30 +332,97 @@ def build_title_dataframe(input_dir: Path, max_bytes: int = 10000) -> pd.DataFra
     Args:
         input_dir: Path object representing the directory containing RTF files.
         max_bytes: Maximum number of bytes to read per file for title extraction.
+        resolve_symlinks: If True, resolve every file path (following symlinked files);
+                          otherwise only input_dir is resolved and file names are joined to it.
+        use_cache: Reuse titles cached in this process or at TITLE_CACHE_PATH for files
+                   whose size and modification time are unchanged, and cache newly
+                   extracted ones. Off by default; the CLI and GUI turn it on
+                   (GUIConfig.use_title_cache).
+        force: Re-extract every title even if cached (the cache is still refreshed).
 
     Returns:
         A pandas DataFrame with columns 'filepath' (Path object), 'filename_stem' (str), 
         and 'title' (str | None).
     """
-    rtf_files = list(input_dir.glob('*.rtf'))
-    if not rtf_files:
-        logging.warning(f"No RTF files found in {input_dir}")
+    # scandir entries carry their file type, so no extra stat per file. Matches the files
+    # input_dir.glob('*.rtf') would: the suffix check is case-insensitive only on Windows
+    # (normcase) and dotfiles are included. Symlinks to files are followed, as glob
+    # returned them and resolve_symlinks exists for them; directories are skipped.
+    try:
+        with os.scandir(input_dir) as entries:
+            rtf_entries = [entry for entry in entries
+                           if os.path.normcase(entry.name).endswith('.rtf') and entry.is_file()]
+    except FileNotFoundError:
+        rtf_entries = [] # Reported as no RTF files below
+    if not rtf_entries:
+        logger.warning("No RTF files found in %s", input_dir)
         return pd.DataFrame({'filepath': [], 'filename_stem': [], 'title': []}) # Return empty DataFrame with new column
 
-    logging.info(f"Found {len(rtf_files)} RTF files in {input_dir}. Extracting titles...")
-
-    data = []
-    for rtf_path in rtf_files:
-        title = _extract_title_from_single_rtf(rtf_path, max_bytes)
-        filename_stem = rtf_path.stem # Get filename without extension
-        # Store absolute path for consistency
-        data.append({
-            'filepath': rtf_path.resolve(), 
-            'filename_stem': filename_stem,
-            'title': title
-        })
-        # Log progress periodically if needed (e.g., every 50 files)
-
-    df = pd.DataFrame(data)
-    logging.info(f"Finished extracting titles. Found titles for {df['title'].notna().sum()} out of {len(df)} files.")
+    logger.info("Found %s RTF files in %s. Extracting titles...", len(rtf_entries), input_dir)
+
+    # Store absolute paths for consistency. Files are read through these paths too,
+    # so only one Path is built per file (building Paths dominates the scan)
+    if resolve_symlinks:
+        filepaths = [Path(entry.path).resolve() for entry in rtf_entries]
+    else:
+        abs_dir = input_dir.resolve()
+        filepaths = [abs_dir / entry.name for entry in rtf_entries]
+    # DirEntry caches its stat result, so the cache keys below reuse it
+    sizes = [_entry_size(entry) for entry in rtf_entries]
+
+    # Titles cached for unchanged files are reused, from this process's memo first and
+    # then the on-disk cache; only the rest are extracted
+    keys = None
+    hits = {}
+    cache = None
+    if use_cache:
+        try:
+            keys = []
+            for entry, filepath in zip(rtf_entries, filepaths):
+                stat = entry.stat()
+                keys.append((str(filepath), stat.st_size, stat.st_mtime_ns))
+        except OSError as e:
+            logger.warning("Title cache unavailable (%s); extracting all titles", e)
+            keys = None
+    if keys is not None:
+        if not force:
+            hits = {key[0]: _title_memo[key + (max_bytes,)] for key in keys if key + (max_bytes,) in _title_memo}
+        try:
+            cache = _TitleCache()
+            if not force and len(hits) < len(keys):
+                disk_hits = cache.lookup([key for key in keys if key[0] not in hits], max_bytes)
+                _memo_titles([key + (disk_hits[key[0]],) for key in keys if key[0] in disk_hits], max_bytes)
+                hits.update(disk_hits)
+        except (sqlite3.Error, OSError) as e:
+            logger.warning("Title cache unavailable (%s); using titles cached in this process only", e)
+            if cache is not None:
+                cache.close()
+            cache = None
+        logger.info("Using cached titles for %s files", len(hits))
+
+    if keys is None:
+        titles = _extract_titles(filepaths, max_bytes, sizes)
+    else:
+        misses = [i for i, key in enumerate(keys) if key[0] not in hits]
+        titles = [hits.get(key[0]) for key in keys]
+        extracted = _extract_titles([filepaths[i] for i in misses], max_bytes, [sizes[i] for i in misses])
+        for i, title in zip(misses, extracted):
+            titles[i] = title
+        new_entries = [keys[i] + (titles[i],) for i in misses]
+        _memo_titles(new_entries, max_bytes)
+        if cache is not None:
+            try:
+                cache.store(new_entries, max_bytes)
+            except sqlite3.Error as e:
+                logger.warning("Could not update title cache: %s", e)
+            finally:
+                cache.close()
+
+    # Build the frame from whole columns rather than one dict per file
+    df = pd.DataFrame({
+        'filepath': filepaths,
+        'filename_stem': [entry.name[:-4] for entry in rtf_entries], # Filename without the .rtf extension
+        'title': pd.Series(titles, dtype=TITLE_DTYPE)
+    })
+    logger.info("Finished extracting titles. Found titles for %s out of %s files.", df['title'].notna().sum(), len(df))
     return df
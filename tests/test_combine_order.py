@@ -0,0 +1,50 @@
+#!/usr/bin/env python3
+"""
+Test that combined PDF pages follow the same numeric section order as the TOC.
+"""
+
+import sys
+from pathlib import Path
+
+# Add the project root to path
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import fitz
+import pandas as pd
+
+from src.data_processing import create_toc_structure
+from src.pdf_utils import combine_pdfs
+
+def write_pdf(path, page_count, label):
+    doc = fitz.open()
+    for _ in range(page_count):
+        doc.new_page().insert_text((72, 72), label)
+    doc.save(str(path))
+    doc.close()
+
+def test_combine_pdfs_orders_sections_numerically(tmp_path):
+    pdf_folder = tmp_path / "_pdf"
+    pdf_folder.mkdir()
+    # Section '10' comes first in the frame and as text; section '2' must come first in the PDF
+    files = [('10', 't10_a', 1), ('2', 't2_b', 3), ('2', 't2_a', 2)]
+    for _section, stem, page_count in files:
+        write_pdf(pdf_folder / f"{stem}.pdf", page_count, stem)
+    final_df = pd.DataFrame({
+        'section_number': [section for section, _stem, _count in files],
+        'filename_stem': [stem for _section, stem, _count in files],
+        'ICH_section_name': ['Section'] * len(files),
+        'title': [f"Title {stem}" for _section, stem, _count in files],
+        'filepath': [str(tmp_path / f"{stem}.rtf") for _section, stem, _count in files]
+    })
+
+    combined_path, page_map = combine_pdfs(final_df, pdf_folder, tmp_path / "combined.pdf")
+
+    toc_stems = create_toc_structure(final_df).query("type == 'entry'")['filename_stem'].tolist()
+    assert toc_stems == ['t2_a', 't2_b', 't10_a']
+    # page_map follows the TOC order, with each file starting after the previous one
+    assert [Path(path).stem for path in page_map] == toc_stems
+    assert list(page_map.values()) == [1, 3, 6]
+    # and so do the pages themselves
+    with fitz.open(str(combined_path)) as combined:
+        page_labels = [page.get_text().strip() for page in combined]
+    assert page_labels == ['t2_a'] * 2 + ['t2_b'] * 3 + ['t10_a']
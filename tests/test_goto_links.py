@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+"""
+Test that TOC links written through PyMuPDF's annotation fast path match insert_link's.
+"""
+
+import sys
+from pathlib import Path
+
+# Add the project root to path
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import fitz
+
+from src.pdf_utils import _add_goto_links
+
+class PageWithoutFastPath:
+    """A page lacking Page._addAnnot_FromString, so _add_goto_links falls back to insert_link."""
+
+    def __init__(self, page):
+        self.page = page
+
+    def insert_link(self, link):
+        self.page.insert_link(link)
+
+def make_doc():
+    doc = fitz.open()
+    for _ in range(4):
+        doc.new_page(width=595, height=842)
+    # A link already on the TOC page, so new link names must avoid its name
+    doc[0].insert_link({"kind": fitz.LINK_GOTO, "from": fitz.Rect(50, 20, 300, 30), "page": 3, "zoom": 0})
+    return doc
+
+def link_summary(page):
+    return [(link["kind"], tuple(round(v, 3) for v in link["from"]), link["page"],
+             tuple(round(v, 3) for v in link["to"])) for link in page.get_links()]
+
+def test_goto_links_match_insert_link():
+    links = [(fitz.Rect(50, 100 + 12 * i, 545, 110 + 12 * i), 1 + i % 3) for i in range(6)]
+
+    fast_doc = make_doc()
+    _add_goto_links(fast_doc[0], links)
+
+    fallback_doc = make_doc()
+    _add_goto_links(PageWithoutFastPath(fallback_doc[0]), links)
+
+    reference_doc = make_doc()
+    for rect, target_page_idx in links:
+        reference_doc[0].insert_link({"kind": fitz.LINK_GOTO, "from": rect, "page": target_page_idx, "zoom": 0})
+
+    expected = link_summary(reference_doc[0])
+    assert len(expected) == len(links) + 1
+    assert link_summary(fast_doc[0]) == expected
+    assert link_summary(fallback_doc[0]) == expected
+    # Every link annotation keeps a unique name
+    names = [annot_id for _, _, annot_id in fast_doc[0].annot_xrefs()]
+    assert len(set(names)) == len(names)
@@ -0,0 +1,30 @@
+#!/usr/bin/env python3
+"""
+Test that documents are sorted by section number numerically, part by part.
+"""
+
+import sys
+from pathlib import Path
+
+# Add the project root to path
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import pandas as pd
+
+from src.data_processing import sort_by_section
+
+def test_sort_by_section():
+    df = pd.DataFrame({
+        'section_number': ['10', '2', '14.10', '14.2', '2'],
+        'filename_stem': ['d', 'b', 'f', 'e', 'a']
+    })
+
+    sorted_df = sort_by_section(df)
+
+    assert sorted_df['section_number'].tolist() == ['2', '2', '10', '14.2', '14.10']
+    # Filename stem orders files within a section
+    assert sorted_df['filename_stem'].tolist() == ['a', 'b', 'd', 'e', 'f']
+
+if __name__ == "__main__":
+    test_sort_by_section()
+    print("sort_by_section orders sections numerically")
@@ -0,0 +1,47 @@
+#!/usr/bin/env python3
+"""
+Test that cached titles are only reused while a file's size and mtime are unchanged.
+"""
+
+import os
+import sys
+from pathlib import Path
+
+# Add the project root to path
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from src import rtf_parser
+from src.rtf_parser import build_title_dataframe
+
+def write_rtf(path, title):
+    path.write_bytes(b"{\\rtf1\\ansi " + title.encode() + b"\\par Body text\\par}")
+
+def test_title_cache_invalidation(tmp_path, monkeypatch):
+    monkeypatch.setattr(rtf_parser, "TITLE_CACHE_PATH", tmp_path / "cache" / "titles.sqlite3")
+    monkeypatch.setattr(rtf_parser, "_title_memo", {})
+    input_dir = tmp_path / "input"
+    input_dir.mkdir()
+    rtf_path = input_dir / "t14_1.rtf"
+
+    write_rtf(rtf_path, "Title A")
+    stat = rtf_path.stat()
+    assert build_title_dataframe(input_dir, use_cache=True)['title'].tolist() == ["Title A"]
+
+    # Same size and mtime: the cached title is reused, from the on-disk cache once the
+    # in-process memo is cleared
+    write_rtf(rtf_path, "Title B")
+    rtf_parser._title_memo.clear()
+    os.utime(rtf_path, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+    assert build_title_dataframe(input_dir, use_cache=True)['title'].tolist() == ["Title A"]
+    # force re-extracts it
+    assert build_title_dataframe(input_dir, use_cache=True, force=True)['title'].tolist() == ["Title B"]
+
+    # A changed mtime invalidates the entry
+    write_rtf(rtf_path, "Title C")
+    os.utime(rtf_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+    assert build_title_dataframe(input_dir, use_cache=True)['title'].tolist() == ["Title C"]
+
+    # So does a changed size, even with the mtime put back
+    write_rtf(rtf_path, "Longer title D")
+    os.utime(rtf_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+    assert build_title_dataframe(input_dir, use_cache=True)['title'].tolist() == ["Longer title D"]